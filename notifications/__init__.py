@@ -2,11 +2,13 @@
 
 from .channels import (
     handle_batch,
+    handle_fetch_batch,
     handle_message,
     parse_event_payload,
     publish_appointment_created_event,
     process_notification_event,
     run_email_worker_forever,
+    send_email_batch_via_mailgun_from_env,
     send_email_via_console,
     send_email_via_mailgun_from_env,
     send_email_notification,
@@ -17,11 +19,13 @@ from .channels import (
 
 __all__ = [
     "handle_batch",
+    "handle_fetch_batch",
     "handle_message",
     "parse_event_payload",
     "publish_appointment_created_event",
     "process_notification_event",
     "run_email_worker_forever",
+    "send_email_batch_via_mailgun_from_env",
     "send_email_via_console",
     "send_email_via_mailgun_from_env",
     "send_email_notification",
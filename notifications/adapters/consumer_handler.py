@@ -11,15 +11,37 @@ Mental model refresher:
 
 from __future__ import annotations
 
-from typing import Any, Callable, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+import functools
+import time
+from typing import Any, Callable, Iterable, Mapping, Protocol, Sequence, TypeVar
 
 from ..application.process import process_notification_event
-from ..types import EventDict, SendEmailFn, SendSMSFn
+from ..types import EventDict, ProcessingResult, SendEmailBatchFn, SendEmailFn, SendSMSFn
 from .payload import parse_event_payload
+from .real_senders import ProviderUnavailableError
 
 Record = Mapping[str, Any]
 CommitFn = Callable[[Record], None]
 RejectFn = Callable[[Record, str], None]
+DeferFn = Callable[[Record, ProviderUnavailableError], None]
+CommitOffsetsFn = Callable[[dict[tuple[Any, Any], int]], None]
+
+
+class DLQSink(Protocol):
+    """Producer-like DLQ target, e.g. a kafka-python `KafkaProducer`."""
+
+    def send(self, topic: str, *, value: Any) -> Any: ...
+
+    def flush(self) -> None: ...
+
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+# (epoch millisecond, ISO string) of the last DLQ `failed_at` timestamp.
+_FAILED_AT_CACHE: tuple[int, str] = (-1, "")
 
 
 def handle_message(
@@ -29,50 +51,41 @@ def handle_message(
     send_sms: SendSMSFn,
     commit: CommitFn,
     reject: RejectFn | None = None,
+    defer: DeferFn | None = None,
 ) -> dict[str, Any]:
     """Handle one incoming record and decide commit/no-commit.
 
     Commit policy in this demo:
     - Commit only when all requested channels succeed.
     - Do not commit on parse failures or channel failures.
+    - If a failed channel hit an unavailable provider (open circuit breaker)
+      and no requested channel was delivered, neither commit nor reject: the
+      record should be redelivered later, not dead-lettered. `defer` is called
+      instead, with the provider error.
+    - Redelivering a record whose other channel already went out would resend
+      it, so such records (and every record when no `defer` is given) are
+      rejected as usual.
     """
     try:
-        payload = _get_record_payload(record)
-        event = parse_event_payload(payload)
+        event = parse_event_payload(_get_record_payload(record))
     except Exception as exc:
-        error = f"parse_failed: {exc}"
-        if reject is not None:
-            reject(record, error)
-        return {
-            "status": "parse_failed",
-            "record_meta": _record_meta(record),
-            "event": None,
-            "processing": None,
-            "should_commit": False,
-            "error": error,
-        }
-
-    processing = process_notification_event(event, send_email=send_email, send_sms=send_sms)
-    should_commit = bool(processing["all_requested_succeeded"])
-
-    if should_commit:
-        commit(record)
-        status = "processed_and_committed"
-        error = None
-    else:
-        status = "processed_not_committed"
-        error = "one_or_more_requested_channels_failed"
-        if reject is not None:
-            reject(record, error)
+        return _parse_failed_result(record, exc, reject)
 
-    return {
-        "status": status,
-        "record_meta": _record_meta(record),
-        "event": event,
-        "processing": processing,
-        "should_commit": should_commit,
-        "error": error,
-    }
+    unavailable: list[ProviderUnavailableError] = []
+    processing = process_notification_event(
+        event,
+        send_email=_noting_unavailable(send_email, unavailable),
+        send_sms=_noting_unavailable(send_sms, unavailable),
+    )
+    return _commit_decision(
+        record,
+        event,
+        processing,
+        commit=commit,
+        reject=reject,
+        unavailable=unavailable,
+        defer=defer,
+    )
 
 
 def handle_batch(
@@ -82,21 +95,313 @@ def handle_batch(
     send_sms: SendSMSFn,
     commit: CommitFn,
     reject: RejectFn | None = None,
+    max_workers: int | None = None,
+    send_email_batch: SendEmailBatchFn | None = None,
+    dlq_sink: DLQSink | None = None,
+    dlq_topic: str | None = None,
+    defer: DeferFn | None = None,
 ) -> list[dict[str, Any]]:
-    """Handle a batch of records sequentially using `handle_message`."""
+    """Handle a batch of records using `handle_message`.
+
+    Records run sequentially by default. With `max_workers > 1` they are
+    dispatched to a thread pool so blocking provider sends overlap; results
+    keep input order, but `commit`/`reject` may then be called from worker
+    threads in any order.
+
+    With `send_email_batch`, every email the batch produces is handed to that
+    one call (e.g. Mailgun batch sending) instead of one `send_email` per
+    record. If the batch call fails, its undelivered emails are retried
+    through `send_email` so commit decisions stay per record. An exception
+    with an `undelivered` attribute (see `real_senders.EmailBatchSendError`)
+    limits the retry to those messages; otherwise every email is retried.
+
+    With `dlq_sink`, rejected records are wrapped in DLQ envelopes and sent
+    to `dlq_topic` (default: `<source topic>.dlq`) after the batch, followed
+    by one `dlq_sink.flush()` for the whole batch. `reject` is still called
+    per record. A failed send does not stop the others, and the flush always
+    runs; that record's result gets a `dlq_error` entry. Records deferred for
+    an unavailable provider (see `handle_message`) are neither rejected nor
+    dead-lettered.
+    """
+    rejected: list[tuple[Record, str]] = []
+    on_reject = reject
+    if dlq_sink is not None:
+
+        def on_reject(record: Record, reason: str) -> None:
+            rejected.append((record, reason))
+            if reject is not None:
+                reject(record, reason)
+
+    if send_email_batch is not None:
+        results = _handle_batch_with_email_batching(
+            records,
+            send_email=send_email,
+            send_email_batch=send_email_batch,
+            send_sms=send_sms,
+            commit=commit,
+            reject=on_reject,
+            max_workers=max_workers,
+            defer=defer,
+        )
+    else:
+
+        def handle(record: Record) -> dict[str, Any]:
+            return handle_message(
+                record,
+                send_email=send_email,
+                send_sms=send_sms,
+                commit=commit,
+                reject=on_reject,
+                defer=defer,
+            )
+
+        results = _map(handle, records, max_workers)
+
+    if dlq_sink is not None and rejected:
+        result_by_record = {id(record): result for record, result in zip(records, results)}
+        try:
+            for record, reason in rejected:
+                try:
+                    dlq_sink.send(
+                        dlq_topic or _dlq_event_type(record["topic"]),
+                        value=_build_dlq_payload(
+                            source_topic=record["topic"],
+                            source_partition=record["partition"],
+                            source_offset=record["offset"],
+                            source_payload=record.get("value"),
+                            failure_reason=reason,
+                        ),
+                    )
+                except Exception as exc:
+                    result_by_record[id(record)]["dlq_error"] = f"dlq_send_failed: {exc}"
+        finally:
+            dlq_sink.flush()
+    return results
+
+
+def handle_fetch_batch(
+    records: Sequence[Record],
+    *,
+    send_email: SendEmailFn,
+    send_sms: SendSMSFn,
+    commit_offsets: CommitOffsetsFn,
+    reject: RejectFn | None = None,
+    defer: DeferFn | None = None,
+) -> list[dict[str, Any]]:
+    """Handle one Kafka fetch in order and commit it with a single callback.
+
+    Instead of one `commit(record)` per record, `commit_offsets` is called at
+    most once with `{(topic, partition): next_offset}` (last committed offset
+    + 1, Kafka's convention). A partition only advances over its leading run
+    of committable records: the first failure holds its committed offset
+    back, even if later records in the fetch succeeded.
+
+    Holding the commit back does not move the consumer's fetch position, so
+    the failed record is not redelivered to this consumer on its own; it is
+    read again only after a restart or rebalance (along with the later
+    records, which are then processed again). Callers that want an immediate
+    retry must `seek` the partition back themselves.
+    """
     results: list[dict[str, Any]] = []
+    next_offsets: dict[tuple[Any, Any], int] = {}
+    held_back: set[tuple[Any, Any]] = set()
     for record in records:
         result = handle_message(
             record,
             send_email=send_email,
             send_sms=send_sms,
-            commit=commit,
+            commit=_defer_commit,
             reject=reject,
+            defer=defer,
         )
         results.append(result)
+        key = (record.get("topic"), record.get("partition"))
+        if key in held_back:
+            continue
+        if result["should_commit"]:
+            next_offsets[key] = int(record["offset"]) + 1
+        else:
+            held_back.add(key)
+
+    if next_offsets:
+        commit_offsets(next_offsets)
+    return results
+
+
+def _defer_commit(record: Record) -> None:
+    """Per-record commit hook for `handle_fetch_batch`, which commits once."""
+
+
+def _handle_batch_with_email_batching(
+    records: Sequence[Record],
+    *,
+    send_email: SendEmailFn,
+    send_email_batch: SendEmailBatchFn,
+    send_sms: SendSMSFn,
+    commit: CommitFn,
+    reject: RejectFn | None,
+    max_workers: int | None,
+    defer: DeferFn | None,
+) -> list[dict[str, Any]]:
+    results: list[dict[str, Any]] = [{} for _ in records]
+    staged: list[tuple[int, EventDict]] = []
+    for index, record in enumerate(records):
+        try:
+            staged.append((index, parse_event_payload(_get_record_payload(record))))
+        except Exception as exc:
+            results[index] = _parse_failed_result(record, exc, reject)
+
+    # Run the channel rules now, but collect emails instead of sending them.
+    outboxes: list[list[dict[str, str]]] = [[] for _ in staged]
+    unavailable: list[list[ProviderUnavailableError]] = [[] for _ in staged]
+
+    def process(position: int) -> ProcessingResult:
+        outbox = outboxes[position]
+
+        def defer_email(*, to_email: str, subject: str, body: str) -> None:
+            outbox.append({"to_email": to_email, "subject": subject, "body": body})
+
+        return process_notification_event(
+            staged[position][1],
+            send_email=defer_email,
+            send_sms=_noting_unavailable(send_sms, unavailable[position]),
+        )
+
+    processings = _map(process, range(len(staged)), max_workers)
+
+    messages = [message for outbox in outboxes for message in outbox]
+    if messages:
+        try:
+            send_email_batch(messages)
+        except Exception as exc:
+            # Match by identity: a partial failure hands back our own dicts.
+            undelivered = {id(message) for message in getattr(exc, "undelivered", messages)}
+
+            def send_individually(position: int) -> None:
+                for message in outboxes[position]:
+                    if id(message) not in undelivered:
+                        continue
+                    try:
+                        send_email(**message)
+                    except Exception as exc:
+                        if isinstance(exc, ProviderUnavailableError):
+                            unavailable[position].append(exc)
+                        _mark_email_failed(processings[position], str(exc))
+
+            _map(send_individually, range(len(staged)), max_workers)
+
+    for position, ((index, event), processing) in enumerate(zip(staged, processings)):
+        results[index] = _commit_decision(
+            records[index],
+            event,
+            processing,
+            commit=commit,
+            reject=reject,
+            unavailable=unavailable[position],
+            defer=defer,
+        )
     return results
 
 
+def _noting_unavailable(
+    send: Callable[..., None],
+    unavailable: list[ProviderUnavailableError],
+) -> Callable[..., None]:
+    """Wrap a sender so `ProviderUnavailableError`s are recorded, then re-raised."""
+
+    def send_noting_unavailable(**kwargs: Any) -> None:
+        try:
+            send(**kwargs)
+        except ProviderUnavailableError as exc:
+            unavailable.append(exc)
+            raise
+
+    return send_noting_unavailable
+
+
+def _map(
+    function: Callable[[_T], _R],
+    items: Iterable[_T],
+    max_workers: int | None,
+) -> list[_R]:
+    items = list(items)
+    if max_workers is None or max_workers <= 1 or len(items) <= 1:
+        return [function(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(function, items))
+
+
+def _mark_email_failed(processing: ProcessingResult, error: str) -> None:
+    for item in processing["channel_results"]:
+        if item["channel"] == "email":
+            item["success"] = False
+            item["error"] = error
+    processing["all_requested_succeeded"] = False
+
+
+def _parse_failed_result(
+    record: Record,
+    exc: Exception,
+    reject: RejectFn | None,
+) -> dict[str, Any]:
+    error = f"parse_failed: {exc}"
+    if reject is not None:
+        reject(record, error)
+    return {
+        "status": "parse_failed",
+        "record_meta": _record_meta(record),
+        "event": None,
+        "processing": None,
+        "should_commit": False,
+        "error": error,
+    }
+
+
+def _commit_decision(
+    record: Record,
+    event: EventDict,
+    processing: ProcessingResult,
+    *,
+    commit: CommitFn,
+    reject: RejectFn | None,
+    unavailable: Sequence[ProviderUnavailableError] = (),
+    defer: DeferFn | None = None,
+) -> dict[str, Any]:
+    should_commit = bool(processing["all_requested_succeeded"])
+
+    if should_commit:
+        commit(record)
+        status = "processed_and_committed"
+        error = None
+    elif unavailable and defer is not None and not _any_requested_delivered(processing):
+        status = "provider_unavailable"
+        error = f"provider_unavailable: {unavailable[0]}"
+        defer(record, unavailable[0])
+    else:
+        status = "processed_not_committed"
+        if unavailable:
+            error = f"provider_unavailable: {unavailable[0]}"
+        else:
+            error = "one_or_more_requested_channels_failed"
+        if reject is not None:
+            reject(record, error)
+
+    return {
+        "status": status,
+        "record_meta": _record_meta(record),
+        "event": event,
+        "processing": processing,
+        "should_commit": should_commit,
+        "error": error,
+    }
+
+
+def _any_requested_delivered(processing: ProcessingResult) -> bool:
+    return any(
+        result["requested"] and result["success"] for result in processing["channel_results"]
+    )
+
+
 def _get_record_payload(record: Record) -> EventDict:
     payload = record.get("value")
     if not isinstance(payload, dict):
@@ -110,3 +415,47 @@ def _record_meta(record: Record) -> dict[str, Any]:
         "partition": record.get("partition"),
         "offset": record.get("offset"),
     }
+
+
+@functools.lru_cache(maxsize=64)
+def _dlq_event_type(source_topic: str) -> str:
+    return f"{source_topic}.dlq"
+
+
+def _build_dlq_payload(
+    *,
+    source_topic: str,
+    source_partition: int,
+    source_offset: int,
+    source_payload: Any,
+    failure_reason: str,
+) -> dict[str, Any]:
+    payload = {
+        "event_type": _dlq_event_type(source_topic),
+        "failed_at": _failed_at_timestamp(),
+        "failure_reason": failure_reason,
+        "source": {
+            "topic": source_topic,
+            "partition": source_partition,
+            "offset": source_offset,
+        },
+        "payload": source_payload,
+    }
+
+    if isinstance(source_payload, Mapping):
+        event_id = source_payload.get("event_id")
+        if isinstance(event_id, str) and event_id.strip():
+            payload["source_event_id"] = event_id.strip()
+
+    return payload
+
+
+def _failed_at_timestamp() -> str:
+    """Current UTC time as ISO-8601 (ms precision), formatted once per millisecond."""
+    global _FAILED_AT_CACHE
+    now_ms = time.time_ns() // 1_000_000
+    cached_ms, text = _FAILED_AT_CACHE
+    if cached_ms != now_ms:
+        text = datetime.fromtimestamp(now_ms / 1000, tz=UTC).isoformat(timespec="milliseconds")
+        _FAILED_AT_CACHE = (now_ms, text)
+    return text
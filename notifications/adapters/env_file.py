@@ -0,0 +1,34 @@
+"""`.env` file loader shared by the local scripts.
+
+Mental model refresher:
+- This is an edge/config adapter: it copies `KEY=value` lines into
+  `os.environ` before the runtime reads its settings.
+- Variables already set in the environment win over the file.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from pathlib import Path
+from typing import Iterator
+
+# One assignment per line; blank lines, `#` comments and malformed lines never match.
+_ASSIGNMENT = re.compile(r"^[^\S\n]*([A-Za-z_][A-Za-z0-9_]*)[^\S\n]*=[^\S\n]*(.*?)[^\S\n]*$", re.M)
+
+
+def load_env_file(path: Path) -> None:
+    """Set unset environment variables from `path`, if the file exists."""
+    if not path.exists():
+        return
+    for key, value in parse_env_text(path.read_text(encoding="utf-8")):
+        os.environ.setdefault(key, value)
+
+
+def parse_env_text(text: str) -> Iterator[tuple[str, str]]:
+    """Yield `(key, value)` pairs, stripping one pair of matching quotes."""
+    for match in _ASSIGNMENT.finditer(text):
+        key, value = match.groups()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+            value = value[1:-1]
+        yield key, value
@@ -8,13 +8,39 @@ Mental model refresher:
 
 from __future__ import annotations
 
-from datetime import UTC, datetime
+import atexit
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+import functools
+import inspect
 import json
+import logging
+import logging.handlers
 import os
-from typing import Any, Mapping
+import queue
+import re
+import sys
+import threading
+import time
+from typing import Any, Callable, Mapping
 
-from .consumer_handler import handle_message
-from .real_senders import send_email_via_mailgun_from_env
+try:  # Optional accelerated JSON codec; stdlib `json` is the fallback.
+    import orjson
+except ImportError:
+    orjson = None
+
+from .consumer_handler import _build_dlq_payload, handle_message
+from .real_senders import ProviderUnavailableError, send_email_via_mailgun_from_env
+
+logger = logging.getLogger(__name__)
+
+# Shortest pause before re-reading records deferred for an unavailable provider.
+_MIN_REDELIVERY_DELAY_SECONDS = 1.0
+
+# Shared producer for `publish_appointment_created_event`; see `_get_producer`.
+_PRODUCER: Any | None = None
+_PRODUCER_LOCK = threading.Lock()
 
 
 def publish_appointment_created_event(
@@ -22,23 +48,17 @@ def publish_appointment_created_event(
     *,
     topic: str | None = None,
 ) -> dict[str, Any]:
-    """Publish one `appointments.created` event to Kafka."""
-    _KafkaConsumer, KafkaProducer, _TopicPartition, _OffsetAndMetadata = _import_kafka_python()
-    bootstrap_servers = _bootstrap_servers_from_env()
+    """Publish one `appointments.created` event to Kafka.
+
+    The underlying producer is created on first use and reused by later calls.
+    """
     topic_name = topic or os.getenv("KAFKA_TOPIC_APPOINTMENTS_CREATED", "appointments.created")
     send_timeout_seconds = float(os.getenv("KAFKA_SEND_TIMEOUT_SECONDS", "10"))
 
-    producer = KafkaProducer(
-        bootstrap_servers=bootstrap_servers,
-        value_serializer=_serialize_json_object,
-        acks=os.getenv("KAFKA_PRODUCER_ACKS", "all"),
-    )
-    try:
-        future = producer.send(topic_name, value=dict(payload))
-        metadata = future.get(timeout=send_timeout_seconds)
-        producer.flush(timeout=send_timeout_seconds)
-    finally:
-        producer.close()
+    producer = _get_producer()
+    future = producer.send(topic_name, value=dict(payload))
+    metadata = future.get(timeout=send_timeout_seconds)
+    producer.flush(timeout=send_timeout_seconds)
 
     return {
         "topic": metadata.topic,
@@ -54,186 +74,498 @@ def run_email_worker_forever() -> int:
     - By default, this worker forces `notify.sms=false` while toll-free SMS
       verification is pending.
     """
-    KafkaConsumer, KafkaProducer, TopicPartition, OffsetAndMetadata = _import_kafka_python()
-    bootstrap_servers = _bootstrap_servers_from_env()
-    topic_name = os.getenv("KAFKA_TOPIC_APPOINTMENTS_CREATED", "appointments.created")
-    dlq_enabled = _env_bool("KAFKA_DLQ_ENABLED", default=True)
-    dlq_topic = os.getenv("KAFKA_TOPIC_APPOINTMENTS_CREATED_DLQ", f"{topic_name}.dlq")
-    group_id = os.getenv("KAFKA_GROUP_ID", "notifications-email-worker")
-    auto_offset_reset = os.getenv("KAFKA_AUTO_OFFSET_RESET", "earliest")
-    poll_timeout_ms = _poll_timeout_ms_from_env()
-    max_records = int(os.getenv("KAFKA_MAX_RECORDS_PER_POLL", "50"))
-    dlq_send_timeout_seconds = float(
-        os.getenv(
-            "KAFKA_DLQ_SEND_TIMEOUT_SECONDS",
-            os.getenv("KAFKA_SEND_TIMEOUT_SECONDS", "10"),
-        )
-    )
-    force_sms_disabled = _env_bool("KAFKA_EMAIL_WORKER_FORCE_SMS_DISABLED", default=True)
+    (
+        KafkaConsumer,
+        KafkaProducer,
+        TopicPartition,
+        OffsetAndMetadata,
+        ConsumerRebalanceListener,
+    ) = _import_kafka_python()
+    config = _WorkerConfig.from_env()
 
     consumer = KafkaConsumer(
-        topic_name,
-        bootstrap_servers=bootstrap_servers,
-        group_id=group_id,
+        bootstrap_servers=config.bootstrap_servers,
+        group_id=config.group_id,
         enable_auto_commit=False,
-        auto_offset_reset=auto_offset_reset,
+        auto_offset_reset=config.auto_offset_reset,
+        max_poll_records=config.max_records,
+        fetch_max_bytes=config.fetch_max_bytes,
+        max_partition_fetch_bytes=config.max_partition_fetch_bytes,
+        fetch_max_wait_ms=config.fetch_max_wait_ms,
     )
     dlq_producer = (
         KafkaProducer(
-            bootstrap_servers=bootstrap_servers,
-            value_serializer=_serialize_json_object,
-            acks=os.getenv("KAFKA_PRODUCER_ACKS", "all"),
+            bootstrap_servers=config.bootstrap_servers,
+            value_serializer=_serialize_dlq_json_object,
+            **config.producer_options,
         )
-        if dlq_enabled
+        if config.dlq_enabled
         else None
     )
-    print(
-        f"[WORKER START] topic={topic_name} group_id={group_id} "
-        f"force_sms_disabled={force_sms_disabled} "
-        f"dlq_enabled={dlq_enabled} dlq_topic={dlq_topic}"
+    stop_logging = _start_log_listener()
+    logger.info(
+        "[WORKER START] topic=%s group_id=%s force_sms_disabled=%s "
+        "dlq_enabled=%s dlq_topic=%s commit_async=%s",
+        config.topic_name,
+        config.group_id,
+        config.force_sms_disabled,
+        config.dlq_enabled,
+        config.dlq_topic,
+        config.commit_async,
     )
 
+    # Highest processed offset per (topic, partition), committed together once
+    # per commit interval instead of one broker round-trip per record.
+    pending_offsets: dict[tuple[str, int], int] = {}
+    # Highest offset already handed to the broker, re-committed synchronously
+    # on shutdown so in-flight async commits are not lost.
+    committed_offsets: dict[tuple[str, int], int] = {}
+    # Records whose offset may be committed, appended by the callbacks below
+    # from send threads and the DLQ producer's I/O thread, and drained on the
+    # poll thread. deque append/popleft are thread-safe.
+    processed_records: deque[Mapping[str, Any]] = deque()
+    # Records left unprocessed because a provider was unavailable, with the
+    # provider's retry delay; appended from send threads like the above.
+    deferred_records: deque[tuple[Mapping[str, Any], float]] = deque()
+    # Partitions to seek back to their lowest deferred offset and pause, and
+    # when each paused partition may be resumed.
+    seek_to: dict[tuple[str, int], int] = {}
+    resume_at: dict[tuple[str, int], float] = {}
+    last_commit_at = time.monotonic()
+    send_email = send_email_via_mailgun_from_env
+    send_sms = _send_sms_noop
+
+    make_offset_and_metadata = _offset_and_metadata_factory(OffsetAndMetadata)
+
+    def flush_pending_offsets(*, asynchronous: bool) -> None:
+        if not pending_offsets:
+            return
+        offsets = {
+            TopicPartition(topic, partition): make_offset_and_metadata(offset + 1)
+            for (topic, partition), offset in pending_offsets.items()
+        }
+        if asynchronous:
+            consumer.commit_async(offsets=offsets, callback=_log_commit_result)
+        else:
+            consumer.commit(offsets=offsets)
+        for key, offset in pending_offsets.items():
+            _mark_offset_processed(committed_offsets, key, offset)
+            logger.info(
+                "[COMMIT] topic=%s partition=%s offset=%s async=%s",
+                key[0],
+                key[1],
+                offset,
+                asynchronous,
+            )
+        pending_offsets.clear()
+
+    def drain_processed_records() -> None:
+        while processed_records:
+            record = processed_records.popleft()
+            _mark_offset_processed(
+                pending_offsets, (record["topic"], record["partition"]), record["offset"]
+            )
+
+    def flush_dlq_producer() -> None:
+        if dlq_producer is not None:
+            try:
+                # Deliver queued DLQ writes so their acks can mark offsets.
+                dlq_producer.flush(timeout=config.dlq_send_timeout_seconds)
+            except Exception:
+                pass
+
+    def settle_deferred_records() -> None:
+        """Keep deferred records uncommitted and schedule their redelivery.
+
+        Call after `drain_processed_records`. Later records of the same batch
+        may already be marked processed; the partition's pending offset is
+        capped below the lowest deferred record so it is not committed past,
+        and the partition is queued for a seek back to that record.
+        """
+        now = time.monotonic()
+        while deferred_records:
+            record, retry_after = deferred_records.popleft()
+            key = (record["topic"], record["partition"])
+            offset = record["offset"]
+            if offset < seek_to.get(key, offset + 1):
+                seek_to[key] = offset
+            if pending_offsets.get(key, -1) >= offset:
+                pending_offsets[key] = offset - 1
+            resume_at[key] = max(
+                resume_at.get(key, now),
+                now + max(retry_after, _MIN_REDELIVERY_DELAY_SECONDS),
+            )
+
+    def commit_processed_offsets() -> None:
+        """Synchronously commit every processed offset, including async-only ones."""
+        flush_dlq_producer()
+        drain_processed_records()
+        settle_deferred_records()
+        if config.commit_async:
+            for topic_partition, offset in committed_offsets.items():
+                _mark_offset_processed(pending_offsets, topic_partition, offset)
+        flush_pending_offsets(asynchronous=False)
+
+    def on_dlq_ack(record: Mapping[str, Any], reason: str, metadata: Any) -> None:
+        logger.warning(
+            "[DLQ] source_topic=%s source_partition=%s source_offset=%s dlq_topic=%s "
+            "dlq_partition=%s dlq_offset=%s reason=%s",
+            record["topic"],
+            record["partition"],
+            record["offset"],
+            metadata.topic,
+            metadata.partition,
+            metadata.offset,
+            reason,
+        )
+        processed_records.append(record)
+
+    def log_no_commit(record: Mapping[str, Any], reason: str) -> None:
+        logger.warning(
+            "[NO-COMMIT] topic=%s partition=%s offset=%s reason=%s",
+            record["topic"],
+            record["partition"],
+            record["offset"],
+            reason,
+        )
+
+    def log_dlq_error(record: Mapping[str, Any], reason: str, exc: BaseException) -> None:
+        logger.error(
+            "[DLQ ERROR] source_topic=%s source_partition=%s source_offset=%s "
+            "reason=%s error=%s",
+            record["topic"],
+            record["partition"],
+            record["offset"],
+            reason,
+            exc,
+        )
+
+    def on_dlq_error(record: Mapping[str, Any], reason: str, exc: BaseException) -> None:
+        log_dlq_error(record, reason, exc)
+        log_no_commit(record, reason)
+
+    def publish_to_dlq(record: Mapping[str, Any], *, reason: str) -> bool:
+        """Queue a DLQ envelope without waiting for the broker ack.
+
+        The source offset is marked processed from `on_dlq_ack` once the DLQ
+        write is acknowledged, so DLQ round-trips overlap with later records.
+        """
+        if dlq_producer is None:
+            return False
+
+        dlq_payload = _build_dlq_payload(
+            source_topic=record["topic"],
+            source_partition=record["partition"],
+            source_offset=record["offset"],
+            source_payload=record.get("value"),
+            failure_reason=reason,
+        )
+        try:
+            future = dlq_producer.send(config.dlq_topic, value=dlq_payload)
+        except Exception as exc:
+            log_dlq_error(record, reason, exc)
+            return False
+        future.add_callback(on_dlq_ack, record, reason)
+        future.add_errback(on_dlq_error, record, reason)
+        return True
+
+    def commit_callback(record: Mapping[str, Any]) -> None:
+        processed_records.append(record)
+
+    def defer_callback(record: Mapping[str, Any], exc: ProviderUnavailableError) -> None:
+        logger.warning(
+            "[DEFER] topic=%s partition=%s offset=%s retry_after=%.1fs reason=%s",
+            record["topic"],
+            record["partition"],
+            record["offset"],
+            exc.retry_after,
+            exc,
+        )
+        deferred_records.append((record, exc.retry_after))
+
+    def reject_callback(record: Mapping[str, Any], reason: str) -> None:
+        if not publish_to_dlq(record, reason=reason):
+            log_no_commit(record, reason)
+
+    def process_message(message: Any) -> None:
+        record: dict[str, Any] = {
+            "topic": message.topic,
+            "partition": message.partition,
+            "offset": message.offset,
+            "value": message.value,
+        }
+        try:
+            payload = _deserialize_json_object(message.value)
+        except Exception as exc:
+            reject_callback(record, f"decode_failed: {exc}")
+            return
+
+        record["value"] = _with_sms_disabled(payload) if config.force_sms_disabled else payload
+        result = handle_message(
+            record,
+            send_email=send_email,
+            send_sms=send_sms,
+            commit=commit_callback,
+            reject=reject_callback,
+            defer=defer_callback,
+        )
+        logger.info(
+            "[RESULT] topic=%s partition=%s offset=%s status=%s should_commit=%s error=%s",
+            message.topic,
+            message.partition,
+            message.offset,
+            result["status"],
+            result["should_commit"],
+            result["error"],
+        )
+
+    # Provider sends are blocking HTTP calls, so records from one poll are
+    # handled concurrently. While they run, this thread already fetches the
+    # next poll; it waits for the previous batch before dispatching the new
+    # one. Only this thread touches the consumer and the offset bookkeeping.
+    executor = ThreadPoolExecutor(
+        max_workers=config.send_concurrency,
+        thread_name_prefix="notifications-send",
+    )
+    in_flight: list[Future[None]] = []
+
+    def redeliver_deferred_partitions() -> set[tuple[str, int]]:
+        """Seek deferred partitions back and pause them; resume those now due.
+
+        Returns the partitions sought back, whose records in the current poll
+        result predate the seek and must not be dispatched.
+        """
+        if deferred_records:
+            # Let queued DLQ acks land first, so `settle_deferred_records` can
+            # cap every offset marked past a deferred record.
+            flush_dlq_producer()
+            drain_processed_records()
+            settle_deferred_records()
+        sought = set(seek_to)
+        for key, offset in seek_to.items():
+            topic_partition = TopicPartition(*key)
+            consumer.seek(topic_partition, offset)
+            consumer.pause(topic_partition)
+        seek_to.clear()
+        now = time.monotonic()
+        for key, due_at in list(resume_at.items()):
+            if due_at <= now and key not in sought:
+                consumer.resume(TopicPartition(*key))
+                del resume_at[key]
+        return sought
+
+    def on_partitions_revoked(revoked: Any) -> None:
+        """Commit finished work before partitions move to another consumer.
+
+        Runs inside `consumer.poll` on this thread. Without it, records
+        processed since the last interval commit (and the whole in-flight
+        batch) would be redelivered to the new owner and notified twice.
+        """
+        wait(in_flight)
+        commit_processed_offsets()
+        # Never re-commit, seek or resume a partition we no longer own; its new
+        # owner picks up from the committed offset.
+        for topic_partition in revoked:
+            key = (topic_partition.topic, topic_partition.partition)
+            committed_offsets.pop(key, None)
+            seek_to.pop(key, None)
+            resume_at.pop(key, None)
+
     try:
+        consumer.subscribe(
+            topics=[config.topic_name],
+            listener=_rebalance_listener(ConsumerRebalanceListener, on_partitions_revoked),
+        )
         while True:
-            batches = consumer.poll(timeout_ms=poll_timeout_ms, max_records=max_records)
-            if not batches:
-                continue
-
-            for _topic_partition, records in batches.items():
-                for message in records:
-                    message_topic = message.topic
-                    message_partition = int(message.partition)
-                    message_offset = int(message.offset)
-
-                    def commit_current_offset() -> None:
-                        offsets = {
-                            TopicPartition(message_topic, message_partition): _offset_and_metadata(
-                                OffsetAndMetadata, message_offset + 1
-                            )
-                        }
-                        consumer.commit(offsets=offsets)
-                        print(
-                            "[COMMIT] "
-                            f"topic={message_topic} partition={message_partition} "
-                            f"offset={message_offset}"
-                        )
-
-                    def publish_to_dlq(*, reason: str, source_payload: Any) -> bool:
-                        if dlq_producer is None:
-                            return False
-
-                        dlq_payload = _build_dlq_payload(
-                            source_topic=message_topic,
-                            source_partition=message_partition,
-                            source_offset=message_offset,
-                            source_payload=source_payload,
-                            failure_reason=reason,
-                        )
-                        try:
-                            future = dlq_producer.send(dlq_topic, value=dlq_payload)
-                            metadata = future.get(timeout=dlq_send_timeout_seconds)
-                        except Exception as exc:
-                            print(
-                                "[DLQ ERROR] "
-                                f"source_topic={message_topic} source_partition={message_partition} "
-                                f"source_offset={message_offset} reason={reason} error={exc}"
-                            )
-                            return False
-
-                        print(
-                            "[DLQ] "
-                            f"source_topic={message_topic} source_partition={message_partition} "
-                            f"source_offset={message_offset} dlq_topic={metadata.topic} "
-                            f"dlq_partition={metadata.partition} dlq_offset={metadata.offset} "
-                            f"reason={reason}"
-                        )
-                        return True
-
-                    try:
-                        payload = _deserialize_json_object(message.value)
-                    except Exception as exc:
-                        reason = f"decode_failed: {exc}"
-                        if publish_to_dlq(reason=reason, source_payload=message.value):
-                            commit_current_offset()
-                        else:
-                            print(
-                                f"[NO-COMMIT] topic={message_topic} partition={message_partition} "
-                                f"offset={message_offset} reason={reason}"
-                            )
-                        continue
-
-                    if force_sms_disabled:
-                        payload = _with_sms_disabled(payload)
-
-                    internal_record = {
-                        "topic": message_topic,
-                        "partition": message_partition,
-                        "offset": message_offset,
-                        "value": payload,
-                    }
-
-                    def commit_callback(
-                        _record: Mapping[str, Any],
-                    ) -> None:
-                        _ = _record
-                        commit_current_offset()
-
-                    def reject_callback(
-                        _record: Mapping[str, Any],
-                        reason: str,
-                    ) -> None:
-                        source_payload = _record.get("value")
-                        if publish_to_dlq(reason=reason, source_payload=source_payload):
-                            commit_current_offset()
-                        else:
-                            print(
-                                f"[NO-COMMIT] topic={message_topic} partition={message_partition} "
-                                f"offset={message_offset} reason={reason}"
-                            )
-
-                    result = handle_message(
-                        internal_record,
-                        send_email=send_email_via_mailgun_from_env,
-                        send_sms=_send_sms_noop,
-                        commit=commit_callback,
-                        reject=reject_callback,
-                    )
-                    print(
-                        f"[RESULT] topic={message_topic} partition={message_partition} "
-                        f"offset={message_offset} status={result['status']} "
-                        f"should_commit={result['should_commit']} error={result['error']}"
-                    )
+            batches = consumer.poll(
+                timeout_ms=config.poll_timeout_ms, max_records=config.max_records
+            )
+
+            for future in in_flight:
+                future.result()
+            sought = redeliver_deferred_partitions()
+            drain_processed_records()
+            in_flight = [
+                executor.submit(process_message, message)
+                for records in batches.values()
+                for message in records
+                if (message.topic, message.partition) not in sought
+            ]
+
+            now = time.monotonic()
+            if pending_offsets and now - last_commit_at >= config.commit_interval_seconds:
+                flush_pending_offsets(asynchronous=config.commit_async)
+                last_commit_at = now
     except KeyboardInterrupt:
-        print("[WORKER STOP] received keyboard interrupt")
+        logger.info("[WORKER STOP] received keyboard interrupt")
         return 0
     except Exception as exc:
-        print(f"[WORKER ERROR] {exc}")
+        logger.error("[WORKER ERROR] %s", exc)
         return 1
     finally:
+        # Finish the sends already running but drop queued ones; records that
+        # never ran are not marked processed, so they are simply redelivered.
+        executor.shutdown(wait=True, cancel_futures=True)
+        try:
+            commit_processed_offsets()
+        except Exception as exc:
+            logger.error("[COMMIT ERROR] final offset flush failed: %s", exc)
         try:
             consumer.close()
         except Exception:
             pass
         if dlq_producer is not None:
-            try:
-                dlq_producer.flush(timeout=dlq_send_timeout_seconds)
-            except Exception:
-                pass
             try:
                 dlq_producer.close()
             except Exception:
                 pass
+        stop_logging()
+
+
+@dataclass(frozen=True, slots=True)
+class _WorkerConfig:
+    """Email worker settings, read from the environment once per worker run."""
+
+    bootstrap_servers: list[str]
+    topic_name: str
+    dlq_enabled: bool
+    dlq_topic: str
+    group_id: str
+    auto_offset_reset: str
+    poll_timeout_ms: int
+    max_records: int
+    fetch_max_bytes: int
+    max_partition_fetch_bytes: int
+    fetch_max_wait_ms: int
+    commit_interval_seconds: float
+    commit_async: bool
+    send_concurrency: int
+    dlq_send_timeout_seconds: float
+    force_sms_disabled: bool
+    producer_options: dict[str, Any]
+
+    @classmethod
+    def from_env(cls) -> _WorkerConfig:
+        topic_name = os.getenv("KAFKA_TOPIC_APPOINTMENTS_CREATED", "appointments.created")
+        return cls(
+            bootstrap_servers=_bootstrap_servers_from_env(),
+            topic_name=topic_name,
+            dlq_enabled=_env_bool("KAFKA_DLQ_ENABLED", default=True),
+            dlq_topic=os.getenv("KAFKA_TOPIC_APPOINTMENTS_CREATED_DLQ", f"{topic_name}.dlq"),
+            group_id=os.getenv("KAFKA_GROUP_ID", "notifications-email-worker"),
+            auto_offset_reset=os.getenv("KAFKA_AUTO_OFFSET_RESET", "earliest"),
+            poll_timeout_ms=_poll_timeout_ms_from_env(),
+            max_records=int(os.getenv("KAFKA_MAX_RECORDS_PER_POLL", "500")),
+            fetch_max_bytes=int(os.getenv("KAFKA_FETCH_MAX_BYTES", str(100 * 1024 * 1024))),
+            max_partition_fetch_bytes=int(
+                os.getenv("KAFKA_MAX_PARTITION_FETCH_BYTES", str(4 * 1024 * 1024))
+            ),
+            fetch_max_wait_ms=int(os.getenv("KAFKA_FETCH_MAX_WAIT_MS", "200")),
+            commit_interval_seconds=_commit_interval_seconds_from_env(),
+            commit_async=_env_bool("KAFKA_COMMIT_ASYNC", default=True),
+            send_concurrency=int(os.getenv("NOTIFICATIONS_SEND_CONCURRENCY", "16")),
+            dlq_send_timeout_seconds=float(
+                os.getenv(
+                    "KAFKA_DLQ_SEND_TIMEOUT_SECONDS",
+                    os.getenv("KAFKA_SEND_TIMEOUT_SECONDS", "10"),
+                )
+            ),
+            force_sms_disabled=_env_bool("KAFKA_EMAIL_WORKER_FORCE_SMS_DISABLED", default=True),
+            producer_options=_producer_options_from_env(),
+        )
+
+
+def _rebalance_listener(
+    listener_type: Any,
+    on_partitions_revoked: Callable[[Any], None],
+) -> Any:
+    """Build a kafka-python `ConsumerRebalanceListener` that commits on revoke."""
+
+    class _CommitOnRevokeListener(listener_type):  # type: ignore[misc, valid-type]
+        def on_partitions_revoked(self, revoked: Any) -> None:
+            on_partitions_revoked(revoked)
+
+        def on_partitions_assigned(self, assigned: Any) -> None:
+            pass
+
+    return _CommitOnRevokeListener()
+
+
+def _get_producer() -> Any:
+    """Return the shared publish producer, creating it on first use."""
+    global _PRODUCER
+    producer = _PRODUCER
+    if producer is not None:
+        return producer
+
+    with _PRODUCER_LOCK:
+        if _PRODUCER is None:
+            _KafkaConsumer, KafkaProducer, _TopicPartition, _OffsetAndMetadata, _Listener = (
+                _import_kafka_python()
+            )
+            _PRODUCER = KafkaProducer(
+                bootstrap_servers=_bootstrap_servers_from_env(),
+                value_serializer=_serialize_json_object,
+                **_producer_options_from_env(),
+            )
+            atexit.register(_close_producer)
+        return _PRODUCER
+
+
+def _close_producer() -> None:
+    global _PRODUCER
+    with _PRODUCER_LOCK:
+        producer, _PRODUCER = _PRODUCER, None
+    if producer is None:
+        return
+    try:
+        producer.close()
+    except Exception:
+        pass
+
+
+def _start_log_listener() -> Callable[[], None]:
+    """Route worker logs through a queue so stderr writes leave the send threads.
+
+    Returns a function that stops the listener, detaches the handler and
+    restores the logger's previous level and `propagate` setting.
+    """
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+
+    previous_level, previous_propagate = logger.level, logger.propagate
+    logger.addHandler(queue_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    listener.start()
+
+    def stop() -> None:
+        listener.stop()
+        logger.removeHandler(queue_handler)
+        logger.setLevel(previous_level)
+        logger.propagate = previous_propagate
+
+    return stop
 
 
-def _import_kafka_python() -> tuple[Any, Any, Any, Any]:
+def _import_kafka_python() -> tuple[Any, Any, Any, Any, Any]:
     try:
-        from kafka import KafkaConsumer, KafkaProducer, TopicPartition
+        from kafka import ConsumerRebalanceListener, KafkaConsumer, KafkaProducer, TopicPartition
         from kafka.structs import OffsetAndMetadata
     except Exception as exc:
         raise RuntimeError(
             "Kafka support requires `kafka-python`. Install with: pip install kafka-python"
         ) from exc
-    return KafkaConsumer, KafkaProducer, TopicPartition, OffsetAndMetadata
+    return (
+        KafkaConsumer,
+        KafkaProducer,
+        TopicPartition,
+        OffsetAndMetadata,
+        ConsumerRebalanceListener,
+    )
 
 
 def _required_env(name: str) -> str:
@@ -243,9 +575,13 @@ def _required_env(name: str) -> str:
     return value.strip()
 
 
+# One `host:port` entry of a comma-separated list, already trimmed.
+_BOOTSTRAP_SERVER_TOKEN = re.compile(r"[^,\s]+")
+
+
 def _bootstrap_servers_from_env() -> list[str]:
     raw = _required_env("KAFKA_BOOTSTRAP_SERVERS")
-    servers = [item.strip() for item in raw.split(",") if item.strip()]
+    servers = _BOOTSTRAP_SERVER_TOKEN.findall(raw)
     if not servers:
         raise RuntimeError("KAFKA_BOOTSTRAP_SERVERS must include at least one host:port")
     return servers
@@ -259,76 +595,150 @@ def _poll_timeout_ms_from_env() -> int:
     return timeout_ms
 
 
+def _producer_options_from_env() -> dict[str, Any]:
+    """Build shared KafkaProducer batching/compression kwargs from env.
+
+    `gzip` works with a plain kafka-python install. `lz4` (faster, slightly
+    larger output) and `zstd` (best ratio) need the `lz4` / `zstandard`
+    packages. Set `KAFKA_PRODUCER_COMPRESSION=none` to disable compression.
+    """
+    compression = os.getenv("KAFKA_PRODUCER_COMPRESSION", "gzip").strip().lower()
+    return {
+        "acks": os.getenv("KAFKA_PRODUCER_ACKS", "all"),
+        "compression_type": None if compression in {"", "none"} else compression,
+        "linger_ms": int(os.getenv("KAFKA_PRODUCER_LINGER_MS", "20")),
+        "batch_size": int(os.getenv("KAFKA_PRODUCER_BATCH_BYTES", "131072")),
+        "max_in_flight_requests_per_connection": 5,
+    }
+
+
+def _commit_interval_seconds_from_env() -> float:
+    interval_ms = int(os.getenv("KAFKA_COMMIT_INTERVAL_MS", "5000"))
+    if interval_ms < 0:
+        raise RuntimeError("KAFKA_COMMIT_INTERVAL_MS must be >= 0")
+    return interval_ms / 1000
+
+
+def _mark_offset_processed(
+    pending_offsets: dict[Any, int],
+    topic_partition: Any,
+    offset: int,
+) -> None:
+    """Record `offset` as processed, keeping only the highest per partition."""
+    if offset > pending_offsets.get(topic_partition, -1):
+        pending_offsets[topic_partition] = offset
+
+
+def _log_commit_result(offsets: Mapping[Any, Any], response: Any) -> None:
+    """Report failures of a `commit_async` call; later commits supersede it."""
+    if isinstance(response, Exception):
+        partitions = ",".join(
+            f"{topic_partition.topic}:{topic_partition.partition}" for topic_partition in offsets
+        )
+        logger.error("[COMMIT ERROR] partitions=%s error=%s", partitions, response)
+
+
 def _serialize_json_object(payload: Mapping[str, Any]) -> bytes:
+    """Strict encoder for published events: unsupported values raise `TypeError`.
+
+    Non-string keys are stringified like stdlib `json` does.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
     return json.dumps(payload, separators=(",", ":")).encode("utf-8")
 
 
+def _serialize_dlq_json_object(payload: Mapping[str, Any]) -> bytes:
+    """Lossy encoder for DLQ envelopes, which must not fail on odd source payloads.
+
+    Raw bytes are decoded with replacement and other unsupported values fall
+    back to `repr`; see `_json_default`.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+
+def _decode_bytes_lossy(value: bytes | bytearray | memoryview) -> str:
+    return bytes(value).decode("utf-8", errors="replace")
+
+
+# Exact-type handlers for `_json_default`; subclasses take the isinstance path.
+_JSON_DEFAULT_HANDLERS: dict[type, Callable[[Any], Any]] = {
+    bytes: _decode_bytes_lossy,
+    bytearray: _decode_bytes_lossy,
+    memoryview: _decode_bytes_lossy,
+    set: list,
+    frozenset: list,
+}
+
+
+def _json_default(value: Any) -> Any:
+    """Convert values the JSON encoder cannot handle natively (e.g. DLQ raw bytes)."""
+    handler = _JSON_DEFAULT_HANDLERS.get(type(value))
+    if handler is not None:
+        return handler(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return _decode_bytes_lossy(value)
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return repr(value)
+
+
+# orjson decodes integers outside the signed/unsigned 64-bit range (19+
+# digits) as floats, while stdlib json keeps them exact. Payloads with such a
+# digit run (also inside strings, which merely costs the slower path) skip orjson.
+_LONG_DIGIT_RUN = re.compile(r"[0-9]{19}")
+_LONG_DIGIT_RUN_BYTES = re.compile(rb"[0-9]{19}")
+
+
+def _loads_json(raw: bytes | str) -> Any:
+    """Decode JSON with orjson when it gives the same result as stdlib json.
+
+    Falls back to stdlib json for long integers (see `_LONG_DIGIT_RUN`) and
+    for input orjson rejects but stdlib json accepts, e.g. `NaN`/`Infinity`.
+    """
+    if orjson is not None:
+        pattern = _LONG_DIGIT_RUN_BYTES if isinstance(raw, bytes) else _LONG_DIGIT_RUN
+        if pattern.search(raw) is None:
+            try:
+                # orjson parses UTF-8 bytes directly, without a decoded str.
+                return orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                pass
+    return json.loads(raw.decode("utf-8") if isinstance(raw, bytes) else raw)
+
+
 def _deserialize_json_object(raw: bytes | str | Mapping[str, Any]) -> dict[str, Any]:
     if isinstance(raw, Mapping):
         return dict(raw)
 
-    if isinstance(raw, bytes):
-        text = raw.decode("utf-8")
-    elif isinstance(raw, str):
-        text = raw
-    else:
+    if not isinstance(raw, (bytes, str)):
         raise ValueError(f"Unsupported Kafka payload type: {type(raw).__name__}")
 
-    parsed = json.loads(text)
+    parsed = _loads_json(raw)
     if not isinstance(parsed, dict):
         raise ValueError("Kafka payload must decode to a JSON object")
     return parsed
 
 
-def _with_sms_disabled(payload: Mapping[str, Any]) -> dict[str, Any]:
-    payload_copy: dict[str, Any] = dict(payload)
-    notify_raw = payload_copy.get("notify")
-    notify = dict(notify_raw) if isinstance(notify_raw, Mapping) else {}
-    notify["sms"] = False
-    payload_copy["notify"] = notify
-    return payload_copy
-
-
-def _build_dlq_payload(
-    *,
-    source_topic: str,
-    source_partition: int,
-    source_offset: int,
-    source_payload: Any,
-    failure_reason: str,
-) -> dict[str, Any]:
-    payload = {
-        "event_type": f"{source_topic}.dlq",
-        "failed_at": datetime.now(tz=UTC).isoformat(),
-        "failure_reason": failure_reason,
-        "source": {
-            "topic": source_topic,
-            "partition": source_partition,
-            "offset": source_offset,
-        },
-        "payload": _to_json_compatible(source_payload),
-    }
-
-    if isinstance(source_payload, Mapping):
-        event_id = source_payload.get("event_id")
-        if isinstance(event_id, str) and event_id.strip():
-            payload["source_event_id"] = event_id.strip()
+def _with_sms_disabled(payload: dict[str, Any]) -> dict[str, Any]:
+    """Force `notify.sms=false` in place.
 
+    The worker owns the freshly decoded payload, so a plain `notify` dict is
+    updated without copying. Any other mapping is copied first so its other
+    flags (e.g. `notify.email`) survive.
+    """
+    notify = payload.get("notify")
+    if not isinstance(notify, dict):
+        notify = dict(notify) if isinstance(notify, Mapping) else {}
+        payload["notify"] = notify
+    notify["sms"] = False
     return payload
 
 
-def _to_json_compatible(value: Any) -> Any:
-    if value is None or isinstance(value, (str, int, float, bool)):
-        return value
-    if isinstance(value, bytes):
-        return value.decode("utf-8", errors="replace")
-    if isinstance(value, Mapping):
-        return {str(key): _to_json_compatible(item) for key, item in value.items()}
-    if isinstance(value, (list, tuple, set)):
-        return [_to_json_compatible(item) for item in value]
-    return repr(value)
-
-
 def _env_bool(name: str, default: bool) -> bool:
     raw = os.getenv(name)
     if raw is None:
@@ -349,10 +759,34 @@ def _send_sms_noop(*, to_phone_e164: str, message: str) -> None:
 
 def _offset_and_metadata(offset_and_metadata_type: Any, offset: int) -> Any:
     """Build kafka-python OffsetAndMetadata across version signatures."""
+    return _offset_and_metadata_factory(offset_and_metadata_type)(offset)
+
+
+@functools.lru_cache(maxsize=8)
+def _offset_and_metadata_factory(offset_and_metadata_type: Any) -> Callable[[int], Any]:
+    """Resolve the OffsetAndMetadata constructor signature once per type.
+
+    kafka-python >= 2.1 takes `(offset, metadata, leader_epoch)`; older
+    releases take `(offset, metadata)`. The returned builder only takes the
+    offset and is cached per type, so neither the worker nor
+    `_offset_and_metadata` re-probes signatures per commit.
+    """
     try:
-        return offset_and_metadata_type(offset, "", -1)
-    except TypeError:
+        signature = inspect.signature(offset_and_metadata_type)
+    except (TypeError, ValueError):
+        signature = None
+
+    if signature is not None:
+        try:
+            signature.bind(0, "", -1)
+        except TypeError:
+            return lambda offset: offset_and_metadata_type(offset, "")
+        return lambda offset: offset_and_metadata_type(offset, "", -1)
+
+    for extra_args in (("", -1), ("", None), ("",)):
         try:
-            return offset_and_metadata_type(offset, "", None)
+            offset_and_metadata_type(0, *extra_args)
         except TypeError:
-            return offset_and_metadata_type(offset, "")
+            continue
+        return lambda offset, extra_args=extra_args: offset_and_metadata_type(offset, *extra_args)
+    raise RuntimeError("Unsupported OffsetAndMetadata signature")
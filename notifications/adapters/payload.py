@@ -10,39 +10,65 @@ Mental model refresher:
 
 from __future__ import annotations
 
+from operator import itemgetter
+from types import MappingProxyType
 from typing import Any
 import os
 
 from ..types import Event, EventDict
 
+# Shared read-only stand-in for a missing `appointment`/`notify` object.
+_EMPTY: Event = MappingProxyType({})
+
+# C-level projections for the common case where every field is present.
+_TOP_FIELDS = itemgetter("event_id", "appointment", "notify")
+_APPOINTMENT_FIELDS = itemgetter("appointment_id", "user_id", "time", "email", "phone_e164")
+_NOTIFY_FIELDS = itemgetter("email", "sms")
+
 
 def parse_event_payload(payload: Event) -> EventDict:
     """Normalize Kafka-style payload into a plain event dictionary.
 
     This is the first handoff from transport data to internal data.
     """
-    appointment = payload.get("appointment", {}) or {}
-    notify = payload.get("notify", {}) or {}
-    owner_email = _as_optional_str(os.getenv("NOTIFICATIONS_OWNER_EMAIL"))
-    contact_email = _as_optional_str(appointment.get("email"))
+    try:
+        event_id, appointment, notify = _TOP_FIELDS(payload)
+        appointment_id, user_id, time, email, phone_e164 = _APPOINTMENT_FIELDS(appointment)
+        notify_email, notify_sms = _NOTIFY_FIELDS(notify)
+    except (KeyError, TypeError):
+        # Some field is missing (or an object is null): fall back to defaults.
+        get = payload.get
+        appointment = get("appointment") or _EMPTY
+        appointment_get = appointment.get
+        notify = get("notify") or _EMPTY
+        notify_get = notify.get
+        event_id = get("event_id")
+        appointment_id = appointment_get("appointment_id")
+        user_id = appointment_get("user_id", "")
+        time = appointment_get("time", "")
+        email = appointment_get("email")
+        phone_e164 = appointment_get("phone_e164")
+        notify_email = notify_get("email", False)
+        notify_sms = notify_get("sms", False)
 
     return {
-        "event_id": _as_required_str(payload.get("event_id"), "event_id"),
-        "appointment_id": _as_required_str(
-            appointment.get("appointment_id"), "appointment.appointment_id"
-        ),
-        "user_id": str(appointment.get("user_id", "")),
-        "appointment_time": str(appointment.get("time", "")),
-        "email": contact_email,
-        "notification_email": owner_email,
-        "phone_e164": _as_optional_str(appointment.get("phone_e164")),
-        "notify_email": bool(notify.get("email", False)),
-        "notify_sms": bool(notify.get("sms", False)),
+        "event_id": _as_required_str(event_id, "event_id"),
+        "appointment_id": _as_required_str(appointment_id, "appointment.appointment_id"),
+        "user_id": _as_str(user_id),
+        "appointment_time": _as_str(time),
+        "email": _as_optional_str(email),
+        "notification_email": _as_optional_str(os.getenv("NOTIFICATIONS_OWNER_EMAIL")),
+        "phone_e164": _as_optional_str(phone_e164),
+        "notify_email": bool(notify_email),
+        "notify_sms": bool(notify_sms),
     }
 
 
 def _as_required_str(value: Any, field_name: str) -> str:
-    text = str(value).strip() if value is not None else ""
+    if type(value) is str:
+        text = value.strip()
+    else:
+        text = str(value).strip() if value is not None else ""
     if not text:
         raise ValueError(f"Missing required field: {field_name}")
     return text
@@ -51,5 +77,10 @@ def _as_required_str(value: Any, field_name: str) -> str:
 def _as_optional_str(value: Any) -> str | None:
     if value is None:
         return None
-    text = str(value).strip()
+    text = value.strip() if type(value) is str else str(value).strip()
     return text or None
+
+
+def _as_str(value: Any) -> str:
+    # JSON-decoded payloads already carry str values; skip the str() call.
+    return value if type(value) is str else str(value)
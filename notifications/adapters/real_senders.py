@@ -15,76 +15,626 @@ Operational note (2026-02-13):
 from __future__ import annotations
 
 import base64
+import email.utils
+import functools
+import http.client
+import json
 import os
-import urllib.error
+import random
+import socket
+import ssl
+import threading
+import time
 import urllib.parse
 import urllib.request
+from types import MappingProxyType
+from typing import Any, Mapping, NamedTuple, Sequence
+
+# Mailgun accepts at most this many recipients per batch-sending call.
+MAILGUN_BATCH_MAX_RECIPIENTS = 1000
+
+_RETRY_BACKOFF_SECONDS = 0.5
+_RETRY_JITTER_SECONDS = 0.5
+_RETRY_MAX_DELAY_SECONDS = 30.0
+_RETRIABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Per-thread keep-alive provider connections; see `_post_form`.
+_CONNECTIONS = threading.local()
+
+# Provider hostname lookups: (host, port) -> (expires_at, addresses or error).
+_DNS_CACHE: dict[tuple[str, int], tuple[float, Any]] = {}
+_DNS_CACHE_LOCK = threading.Lock()
 
 
 def send_email_via_mailgun_from_env(*, to_email: str, subject: str, body: str) -> None:
     """Send email via Mailgun REST API using environment-variable config."""
+    config = _mailgun_config()
+    payload = b"".join(
+        (
+            config.form_prefix,
+            b"&to=",
+            _form_value(to_email),
+            b"&subject=",
+            _form_value(subject),
+            b"&text=",
+            _form_value(body),
+        )
+    )
+    _post_provider("Mailgun email", _mailgun_breaker(), config, payload)
+
+
+class ProviderUnavailableError(RuntimeError):
+    """A provider's circuit breaker is open, so the send was not attempted.
+
+    `retry_after` is the number of seconds until a probe send is let through.
+    Callers should retry the work later rather than treat it as failed for good.
+    """
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class EmailBatchSendError(RuntimeError):
+    """A batch send failed part-way; `undelivered` lists the messages not sent.
+
+    The listed messages are the same mapping objects the caller passed in, so
+    callers can retry exactly those without resending delivered ones.
+    """
+
+    def __init__(self, message: str, undelivered: Sequence[Mapping[str, str]]) -> None:
+        super().__init__(message)
+        self.undelivered = list(undelivered)
+
+
+def send_email_batch_via_mailgun_from_env(messages: Sequence[Mapping[str, str]]) -> None:
+    """Send many emails through Mailgun batch sending.
+
+    Each message uses the `send_email_via_mailgun_from_env` keyword names
+    (`to_email`, `subject`, `body`). Subject and body travel as recipient
+    variables, so every recipient still gets only their own message. Mailgun
+    allows a recipient once per call, so repeated recipients spill into further
+    calls; otherwise up to `MAILGUN_BATCH_MAX_RECIPIENTS` share one POST.
+
+    If one of those calls fails, `EmailBatchSendError` is raised listing the
+    messages of that call and the ones after it; earlier calls were delivered.
+    """
+    if not messages:
+        return
+    config = _mailgun_config()
+    batches = _mailgun_batches(messages)
+    for position, batch in enumerate(batches):
+        recipient_variables = {
+            to_email: {"subject": message["subject"], "body": message["body"]}
+            for to_email, message in batch.items()
+        }
+        payload = urllib.parse.urlencode(
+            {
+                "from": config.from_email,
+                "to": ",".join(batch),
+                "subject": "%recipient.subject%",
+                "text": "%recipient.body%",
+                "recipient-variables": json.dumps(recipient_variables, separators=(",", ":")),
+            }
+        ).encode("utf-8")
+        try:
+            _post_provider("Mailgun email", _mailgun_breaker(), config, payload)
+        except RuntimeError as exc:
+            undelivered = [message for later in batches[position:] for message in later.values()]
+            raise EmailBatchSendError(str(exc), undelivered) from exc
+
+
+def send_sms_via_twilio_from_env(*, to_phone_e164: str, message: str) -> None:
+    """Send SMS via Twilio REST API using environment-variable config."""
+    config = _twilio_config()
+    payload = b"".join(
+        (
+            config.form_prefix,
+            b"&To=",
+            _form_value(to_phone_e164),
+            b"&Body=",
+            _form_value(message),
+        )
+    )
+    _post_provider("Twilio SMS", _twilio_breaker(), config, payload)
+
+
+def reload_provider_config() -> None:
+    """Re-read Mailgun/Twilio settings from the environment on the next send.
+
+    Circuit breakers are rebuilt too, so their state starts over.
+    """
+    _mailgun_config.cache_clear()
+    _twilio_config.cache_clear()
+    _max_retries.cache_clear()
+    _mailgun_breaker.cache_clear()
+    _twilio_breaker.cache_clear()
+
+
+class _MailgunConfig(NamedTuple):
+    from_email: str
+    form_prefix: bytes
+    endpoint: str
+    headers: Mapping[str, str]
+    timeout: float
+    connect_timeout: float
+
+
+class _TwilioConfig(NamedTuple):
+    form_prefix: bytes
+    endpoint: str
+    headers: Mapping[str, str]
+    timeout: float
+    connect_timeout: float
+
+
+@functools.cache
+def _mailgun_config() -> _MailgunConfig:
+    """Resolve Mailgun settings once per process; see `reload_provider_config`."""
     api_key = _required_env("MAILGUN_API_KEY")
     domain = _required_env("MAILGUN_DOMAIN")
     from_email = _required_env("MAILGUN_FROM_EMAIL")
     base_url = os.getenv("MAILGUN_API_BASE_URL", "https://api.mailgun.net").rstrip("/")
     timeout_seconds = float(os.getenv("MAILGUN_TIMEOUT_SECONDS", "10"))
+    connect_timeout_seconds = float(os.getenv("MAILGUN_CONNECT_TIMEOUT_SECONDS", "2"))
 
     encoded_domain = urllib.parse.quote(domain, safe="")
     endpoint = f"{base_url}/v3/{encoded_domain}/messages"
-    payload = urllib.parse.urlencode(
-        {"from": from_email, "to": to_email, "subject": subject, "text": body}
-    ).encode("utf-8")
-
-    request = urllib.request.Request(endpoint, data=payload, method="POST")
-    request.add_header("Authorization", _basic_auth_header("api", api_key))
-    request.add_header("Content-Type", "application/x-www-form-urlencoded")
-
-    try:
-        with urllib.request.urlopen(request, timeout=timeout_seconds) as response:
-            status = int(response.getcode())
-            if status < 200 or status >= 300:
-                raise RuntimeError(f"Mailgun email send failed with status {status}")
-            response.read()
-    except urllib.error.HTTPError as exc:
-        details = exc.read().decode("utf-8", errors="replace")
-        raise RuntimeError(
-            f"Mailgun email send failed HTTP {exc.code}: {details[:300]}"
-        ) from exc
-    except urllib.error.URLError as exc:
-        raise RuntimeError(f"Mailgun email send failed: {exc.reason}") from exc
+    headers = MappingProxyType(
+        {
+            "Authorization": _basic_auth_header("api", api_key),
+            "Content-Type": "application/x-www-form-urlencoded",
+        }
+    )
+    form_prefix = b"from=" + _form_value(from_email)
+    return _MailgunConfig(
+        from_email, form_prefix, endpoint, headers, timeout_seconds, connect_timeout_seconds
+    )
 
 
-def send_sms_via_twilio_from_env(*, to_phone_e164: str, message: str) -> None:
-    """Send SMS via Twilio REST API using environment-variable config."""
+@functools.cache
+def _twilio_config() -> _TwilioConfig:
+    """Resolve Twilio settings once per process; see `reload_provider_config`."""
     account_sid = _required_env("TWILIO_ACCOUNT_SID")
     auth_token = _required_env("TWILIO_AUTH_TOKEN")
     from_phone = _required_env("TWILIO_FROM_PHONE")
     base_url = os.getenv("TWILIO_API_BASE_URL", "https://api.twilio.com").rstrip("/")
     timeout_seconds = float(os.getenv("TWILIO_TIMEOUT_SECONDS", "10"))
+    connect_timeout_seconds = float(os.getenv("TWILIO_CONNECT_TIMEOUT_SECONDS", "2"))
 
     endpoint = f"{base_url}/2010-04-01/Accounts/{account_sid}/Messages.json"
-    payload = urllib.parse.urlencode(
-        {"To": to_phone_e164, "From": from_phone, "Body": message}
-    ).encode("utf-8")
-    auth_header = _basic_auth_header(account_sid, auth_token)
+    headers = MappingProxyType(
+        {
+            "Authorization": _basic_auth_header(account_sid, auth_token),
+            "Content-Type": "application/x-www-form-urlencoded",
+        }
+    )
+    form_prefix = b"From=" + _form_value(from_phone)
+    return _TwilioConfig(
+        form_prefix, endpoint, headers, timeout_seconds, connect_timeout_seconds
+    )
+
+
+@functools.cache
+def _max_retries() -> int:
+    """Retries after the first attempt for 429/5xx answers and connection errors.
+
+    Resolved on first send rather than at import, so values loaded from a
+    `.env` file after `notifications` is imported still apply.
+    """
+    return int(os.getenv("NOTIFICATIONS_PROVIDER_MAX_RETRIES", "4"))
 
-    request = urllib.request.Request(endpoint, data=payload, method="POST")
-    request.add_header("Authorization", auth_header)
-    request.add_header("Content-Type", "application/x-www-form-urlencoded")
 
+def _form_value(value: str) -> bytes:
+    """Encode one form field value exactly as `urllib.parse.urlencode` would."""
+    return urllib.parse.quote_plus(value).encode("ascii")
+
+
+def _mailgun_batches(
+    messages: Sequence[Mapping[str, str]],
+) -> list[dict[str, Mapping[str, str]]]:
+    """Group messages into calls with unique recipients, keeping input order."""
+    batches: list[dict[str, Mapping[str, str]]] = []
+    for message in messages:
+        to_email = message["to_email"]
+        for batch in batches:
+            if to_email not in batch and len(batch) < MAILGUN_BATCH_MAX_RECIPIENTS:
+                batch[to_email] = message
+                break
+        else:
+            batches.append({to_email: message})
+    return batches
+
+
+def _post_provider(
+    label: str,
+    breaker: _CircuitBreaker,
+    config: _MailgunConfig | _TwilioConfig,
+    payload: bytes,
+) -> None:
+    """POST one provider form; raise `RuntimeError` on any failure.
+
+    Connection errors and 429/5xx answers (after retries) count against the
+    provider's circuit breaker. While it is open, sends fail immediately with
+    `ProviderUnavailableError`; a failure that opens (or, as a failed probe,
+    re-opens) the circuit is raised as `ProviderUnavailableError` too.
+    """
+    if not breaker.allow():
+        raise ProviderUnavailableError(
+            f"{label} send failed: provider circuit open", breaker.seconds_until_probe()
+        )
+    error: RuntimeError | None = None
     try:
-        with urllib.request.urlopen(request, timeout=timeout_seconds) as response:
-            status = int(response.getcode())
-            if status < 200 or status >= 300:
-                raise RuntimeError(f"Twilio SMS send failed with status {status}")
-            response.read()
-    except urllib.error.HTTPError as exc:
-        details = exc.read().decode("utf-8", errors="replace")
-        raise RuntimeError(
-            f"Twilio SMS send failed HTTP {exc.code}: {details[:300]}"
-        ) from exc
-    except urllib.error.URLError as exc:
-        raise RuntimeError(f"Twilio SMS send failed: {exc.reason}") from exc
+        status, details = _post_form_with_retries(
+            config.endpoint,
+            payload,
+            headers=config.headers,
+            timeout=config.timeout,
+            connect_timeout=config.connect_timeout,
+        )
+    except (OSError, http.client.HTTPException) as exc:
+        healthy = False
+        error = RuntimeError(f"{label} send failed: {exc}")
+        error.__cause__ = exc
+    except BaseException:
+        breaker.record(False)
+        raise
+    else:
+        healthy = status not in _RETRIABLE_STATUSES
+        if status < 200 or status >= 300:
+            error = RuntimeError(
+                f"{label} send failed HTTP {status}: "
+                f"{details.decode('utf-8', errors='replace')[:300]}"
+            )
+    if breaker.record(healthy) and error is not None:
+        raise ProviderUnavailableError(str(error), breaker.seconds_until_probe()) from error
+    if error is not None:
+        raise error
+
+
+class _CircuitBreaker:
+    """Fail fast after `fail_max` consecutive failed sends to one provider.
+
+    Once open, calls are refused until `reset_seconds` have passed; then a
+    single probe call is let through, and its outcome closes the circuit or
+    restarts the wait.
+    """
+
+    def __init__(self, *, fail_max: int, reset_seconds: float) -> None:
+        self.fail_max = fail_max
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at: float | None = None
+            self._probing = False
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.reset_seconds:
+                return False
+            self._probing = True
+            return True
+
+    def seconds_until_probe(self) -> float:
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(self.reset_seconds - (time.monotonic() - self._opened_at), 0.0)
+
+    def record(self, healthy: bool) -> bool:
+        """Record one call's outcome; return whether the circuit is now open."""
+        with self._lock:
+            self._probing = False
+            if healthy:
+                self._failures = 0
+                self._opened_at = None
+                return False
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.fail_max:
+                self._opened_at = time.monotonic()
+            return self._opened_at is not None
+
+
+@functools.cache
+def _mailgun_breaker() -> _CircuitBreaker:
+    """Mailgun's breaker, built on first send; see `reload_provider_config`."""
+    return _breaker_from_env()
+
+
+@functools.cache
+def _twilio_breaker() -> _CircuitBreaker:
+    """Twilio's breaker, built on first send; see `reload_provider_config`."""
+    return _breaker_from_env()
+
+
+def _breaker_from_env() -> _CircuitBreaker:
+    return _CircuitBreaker(
+        fail_max=int(os.getenv("NOTIFICATIONS_PROVIDER_BREAKER_FAIL_MAX", "5")),
+        reset_seconds=float(os.getenv("NOTIFICATIONS_PROVIDER_BREAKER_RESET_SECONDS", "30")),
+    )
+
+
+def _post_form_with_retries(
+    url: str,
+    body: bytes,
+    *,
+    headers: Mapping[str, str],
+    timeout: float,
+    connect_timeout: float | None = None,
+) -> tuple[int, bytes]:
+    """`_post_form` with up to `_max_retries()` retries for transient failures.
+
+    429/5xx answers and connection errors are retried after an exponential
+    backoff with jitter (or the server's `Retry-After`, when given). Other
+    statuses are returned as-is so callers can treat them as terminal.
+
+    A read timeout means the provider is slow rather than unreachable, so it
+    is retried only once; connect timeouts get the full retry budget. TLS
+    certificate failures and unknown hostnames cannot heal within a backoff
+    window and are raised immediately.
+    """
+    max_retries = _max_retries()
+    attempt = 0
+    read_timeouts = 0
+    while True:
+        try:
+            status, data, retry_after = _post_form(
+                url, body, headers=headers, timeout=timeout, connect_timeout=connect_timeout
+            )
+        except (OSError, http.client.HTTPException) as exc:
+            if _is_permanent_connection_error(exc):
+                raise
+            if isinstance(exc, TimeoutError) and not isinstance(exc, _ConnectTimeout):
+                read_timeouts += 1
+                if read_timeouts > 1:
+                    raise
+            if attempt >= max_retries:
+                raise
+            delay = _backoff_delay(attempt)
+        else:
+            if status not in _RETRIABLE_STATUSES or attempt >= max_retries:
+                return status, data
+            delay = _retry_after_seconds(retry_after)
+            if delay is None:
+                delay = _backoff_delay(attempt)
+        time.sleep(delay)
+        attempt += 1
+
+
+def _is_permanent_connection_error(exc: BaseException) -> bool:
+    if isinstance(exc, ssl.SSLCertVerificationError):
+        return True
+    return isinstance(exc, socket.gaierror) and exc.errno == socket.EAI_NONAME
+
+
+def _backoff_delay(attempt: int) -> float:
+    delay = _RETRY_BACKOFF_SECONDS * 2**attempt + random.uniform(0, _RETRY_JITTER_SECONDS)
+    return min(delay, _RETRY_MAX_DELAY_SECONDS)
+
+
+def _retry_after_seconds(value: str | None) -> float | None:
+    """Parse a `Retry-After` header (delta-seconds or HTTP-date), capped."""
+    if not value:
+        return None
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        delay = retry_at.timestamp() - time.time()
+    return min(max(delay, 0.0), _RETRY_MAX_DELAY_SECONDS)
+
+
+def _post_form(
+    url: str,
+    body: bytes,
+    *,
+    headers: Mapping[str, str],
+    timeout: float,
+    connect_timeout: float | None = None,
+) -> tuple[int, bytes, str | None]:
+    """POST `body` over this thread's keep-alive connection to the URL's host.
+
+    Connections are kept per (scheme, host) and reused across sends, so only the
+    first request to a provider pays the TCP/TLS handshake. A reused connection
+    the server already closed is reopened once. Returns the status, body and
+    `Retry-After` header.
+    """
+    parts = urllib.parse.urlsplit(url)
+    key = (parts.scheme, parts.netloc)
+    path = f"{parts.path}?{parts.query}" if parts.query else parts.path
+    pool = _thread_connections()
+
+    while True:
+        connection = pool.get(key)
+        reused = connection is not None
+        if connection is None:
+            connection = _new_connection(parts.scheme, parts.netloc, timeout, connect_timeout)
+            pool[key] = connection
+        try:
+            connection.request("POST", path, body=body, headers=headers)
+            response = connection.getresponse()
+            if response.will_close and 200 <= response.status < 300:
+                # The socket is discarded anyway and callers ignore success
+                # bodies, so skip copying it.
+                data = b""
+            else:
+                # A kept-alive connection can only carry the next request once
+                # this body has been drained, so it is always read here.
+                data = response.read()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            _drop_connection(pool, key)
+            if reused:
+                continue
+            raise
+        except BaseException:
+            _drop_connection(pool, key)
+            raise
+        if response.will_close:
+            _drop_connection(pool, key)
+        return response.status, data, response.getheader("Retry-After")
+
+
+def _thread_connections() -> dict[tuple[str, str], http.client.HTTPConnection]:
+    pool = getattr(_CONNECTIONS, "pool", None)
+    if pool is None:
+        pool = _CONNECTIONS.pool = {}
+    return pool
+
+
+def _close_connections() -> None:
+    """Close this thread's pooled provider connections."""
+    pool = _thread_connections()
+    for key in list(pool):
+        _drop_connection(pool, key)
+
+
+class _ConnectTimeout(TimeoutError):
+    """The TCP connect to a provider timed out (as opposed to a slow response)."""
+
+
+def _new_connection(
+    scheme: str,
+    netloc: str,
+    timeout: float,
+    connect_timeout: float | None = None,
+) -> http.client.HTTPConnection:
+    """Open a provider connection; `timeout` applies to reads, `connect_timeout` to TCP connect.
+
+    When `HTTP(S)_PROXY` applies to the host (and `NO_PROXY` does not exclude
+    it), the connection goes to the proxy and tunnels through it with CONNECT.
+    """
+    connection_type: type[http.client.HTTPConnection]
+    if scheme == "https":
+        connection_type = http.client.HTTPSConnection
+    elif scheme == "http":
+        connection_type = http.client.HTTPConnection
+    else:
+        raise RuntimeError(f"Unsupported provider URL scheme: {scheme!r}")
+    proxy = _proxy_for(scheme, netloc)
+    if proxy is None:
+        connection = connection_type(netloc, timeout=timeout)
+    else:
+        proxy_netloc, proxy_headers = proxy
+        connection = connection_type(proxy_netloc, timeout=timeout)
+        connection.set_tunnel(netloc, headers=proxy_headers)
+    # http.client opens sockets through this hook; route it via the DNS cache.
+    connection._create_connection = functools.partial(  # type: ignore[attr-defined]
+        _create_connection_cached, connect_timeout=connect_timeout
+    )
+    return connection
+
+
+def _proxy_for(scheme: str, netloc: str) -> tuple[str, dict[str, str]] | None:
+    """Return the proxy `host:port` and CONNECT headers for `netloc`, if any."""
+    proxy_url = urllib.request.getproxies().get(scheme)
+    host = urllib.parse.urlsplit(f"//{netloc}").hostname or netloc
+    if not proxy_url or urllib.request.proxy_bypass(host):
+        return None
+    parts = urllib.parse.urlsplit(proxy_url if "//" in proxy_url else f"http://{proxy_url}")
+    if parts.hostname is None:
+        return None
+    headers = {}
+    if parts.username is not None:
+        headers["Proxy-Authorization"] = _basic_auth_header(
+            urllib.parse.unquote(parts.username), urllib.parse.unquote(parts.password or "")
+        )
+    proxy_host = f"[{parts.hostname}]" if ":" in parts.hostname else parts.hostname
+    return f"{proxy_host}:{parts.port or 80}", headers
+
+
+def flush_dns_cache() -> None:
+    """Forget cached provider hostname lookups (positive and negative)."""
+    with _DNS_CACHE_LOCK:
+        _DNS_CACHE.clear()
+
+
+def _resolve_cached(host: str, port: int) -> list[tuple[Any, ...]]:
+    """Resolve `host:port` via getaddrinfo, cached for the configured TTL.
+
+    "No such host" answers are cached for a shorter negative TTL; temporary
+    resolver failures are never cached.
+    """
+    key = (host, port)
+    now = time.monotonic()
+    with _DNS_CACHE_LOCK:
+        cached = _DNS_CACHE.get(key)
+    if cached is not None and cached[0] > now:
+        if isinstance(cached[1], tuple):
+            # Raise a fresh error each time: a shared instance would pile up
+            # tracebacks and chained causes from every caller.
+            raise socket.gaierror(*cached[1])
+        return cached[1]
+
+    try:
+        addresses = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except socket.gaierror as exc:
+        if exc.errno == socket.EAI_NONAME:
+            ttl = float(os.getenv("NOTIFICATIONS_DNS_NEGATIVE_TTL_SECONDS", "60"))
+            with _DNS_CACHE_LOCK:
+                _DNS_CACHE[key] = (now + ttl, exc.args)
+        raise
+
+    ttl = float(os.getenv("NOTIFICATIONS_DNS_CACHE_TTL_SECONDS", "300"))
+    with _DNS_CACHE_LOCK:
+        _DNS_CACHE[key] = (now + ttl, addresses)
+    return addresses
+
+
+def _create_connection_cached(
+    address: tuple[str, int],
+    timeout: Any = None,
+    source_address: tuple[str, int] | None = None,
+    *,
+    connect_timeout: float | None = None,
+) -> socket.socket:
+    """`socket.create_connection` equivalent that resolves through the DNS cache.
+
+    With `connect_timeout`, the TCP connect uses that limit and the socket is
+    switched to `timeout` afterwards for the TLS handshake and reads.
+    """
+    host, port = address
+    io_timeout = timeout if isinstance(timeout, (int, float)) else socket.getdefaulttimeout()
+    last_error: OSError | None = None
+    for family, socktype, proto, _canonname, sockaddr in _resolve_cached(host, port):
+        sock = socket.socket(family, socktype, proto)
+        try:
+            sock.settimeout(io_timeout if connect_timeout is None else connect_timeout)
+            if source_address:
+                sock.bind(source_address)
+            sock.connect(sockaddr)
+            sock.settimeout(io_timeout)
+            return sock
+        except OSError as exc:
+            last_error = exc
+            sock.close()
+
+    # Every cached address failed; the provider may have moved, so re-resolve
+    # on the next attempt.
+    with _DNS_CACHE_LOCK:
+        _DNS_CACHE.pop((host, port), None)
+    if isinstance(last_error, TimeoutError):
+        raise _ConnectTimeout(f"connect to {host}:{port} timed out") from last_error
+    if last_error is not None:
+        raise last_error
+    raise OSError(f"getaddrinfo returned no addresses for {host}")
+
+
+def _drop_connection(
+    pool: dict[tuple[str, str], http.client.HTTPConnection],
+    key: tuple[str, str],
+) -> None:
+    connection = pool.pop(key, None)
+    if connection is not None:
+        connection.close()
 
 
 def _required_env(name: str) -> str:
@@ -7,13 +7,25 @@ Mental model refresher:
   1) calls email domain logic
   2) calls sms domain logic
   3) aggregates a single success signal used for commit decisions
+- When both channels are requested, the SMS send runs on a shared thread pool
+  while the email send runs on the caller's thread.
 """
 
 from __future__ import annotations
 
+import atexit
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ..domain.email import _not_requested as _email_not_requested
 from ..domain.email import send_email_notification
+from ..domain.sms import _not_requested as _sms_not_requested
 from ..domain.sms import send_sms_notification
-from ..types import Event, ProcessingResult, SendEmailFn, SendSMSFn
+from ..types import ChannelResult, Event, ProcessingResult, SendEmailFn, SendSMSFn
+
+_CHANNEL_EXECUTOR: ThreadPoolExecutor | None = None
+_CHANNEL_EXECUTOR_LOCK = threading.Lock()
 
 
 def process_notification_event(
@@ -21,18 +33,74 @@ def process_notification_event(
     send_email: SendEmailFn,
     send_sms: SendSMSFn,
 ) -> ProcessingResult:
-    """Execute the notification use-case for one normalized event."""
+    """Execute the notification use-case for one normalized event.
+
+    The `(notify_email, notify_sms)` combination picks one of four
+    specialized paths, so unrequested channels are never evaluated.
+    `channel_results` is always a fresh `[email, sms]` list of plain dicts.
+    """
+    get = event.get
+    process = _PROCESSORS[bool(get("notify_email", False)), bool(get("notify_sms", False))]
+    email_result, sms_result, succeeded = process(event, send_email, send_sms)
+    return {
+        "event_id": get("event_id"),
+        "appointment_id": get("appointment_id"),
+        "channel_results": [email_result, sms_result],
+        "all_requested_succeeded": succeeded,
+    }
+
+
+_ChannelOutcome = tuple[ChannelResult, ChannelResult, bool]
+
+
+def _process_neither(
+    event: Event, send_email: SendEmailFn, send_sms: SendSMSFn
+) -> _ChannelOutcome:
+    return _email_not_requested(), _sms_not_requested(), True
+
+
+def _process_email_only(
+    event: Event, send_email: SendEmailFn, send_sms: SendSMSFn
+) -> _ChannelOutcome:
     email_result = send_email_notification(event, send_email)
+    return email_result, _sms_not_requested(), bool(email_result["success"])
+
+
+def _process_sms_only(
+    event: Event, send_email: SendEmailFn, send_sms: SendSMSFn
+) -> _ChannelOutcome:
     sms_result = send_sms_notification(event, send_sms)
-    channel_results = [email_result, sms_result]
+    return _email_not_requested(), sms_result, bool(sms_result["success"])
 
-    all_requested_succeeded = all(
-        (not item["requested"]) or item["success"] for item in channel_results
-    )
 
-    return {
-        "event_id": event.get("event_id"),
-        "appointment_id": event.get("appointment_id"),
-        "channel_results": channel_results,
-        "all_requested_succeeded": all_requested_succeeded,
-    }
+def _process_both(
+    event: Event, send_email: SendEmailFn, send_sms: SendSMSFn
+) -> _ChannelOutcome:
+    # Overlap the two round-trips: SMS on the shared pool, email on this thread.
+    sms_future = _channel_executor().submit(send_sms_notification, event, send_sms)
+    email_result = send_email_notification(event, send_email)
+    sms_result = sms_future.result()
+    return email_result, sms_result, bool(email_result["success"] and sms_result["success"])
+
+
+_PROCESSORS = {
+    (False, False): _process_neither,
+    (True, False): _process_email_only,
+    (False, True): _process_sms_only,
+    (True, True): _process_both,
+}
+
+
+def _channel_executor() -> ThreadPoolExecutor:
+    """Return the process-wide pool for overlapping a second channel send."""
+    global _CHANNEL_EXECUTOR
+    if _CHANNEL_EXECUTOR is None:
+        with _CHANNEL_EXECUTOR_LOCK:
+            if _CHANNEL_EXECUTOR is None:
+                max_workers = int(os.getenv("NOTIFICATIONS_EXECUTOR_WORKERS", "16"))
+                _CHANNEL_EXECUTOR = ThreadPoolExecutor(
+                    max_workers=max(1, max_workers),
+                    thread_name_prefix="notifications-channel",
+                )
+                atexit.register(_CHANNEL_EXECUTOR.shutdown, wait=False)
+    return _CHANNEL_EXECUTOR
@@ -7,10 +7,11 @@ Module layout by abstraction layer:
 """
 
 from .adapters.fake_senders import send_email_via_console, send_sms_via_console
-from .adapters.consumer_handler import handle_batch, handle_message
+from .adapters.consumer_handler import handle_batch, handle_fetch_batch, handle_message
 from .adapters.kafka_runtime import publish_appointment_created_event, run_email_worker_forever
 from .adapters.payload import parse_event_payload
 from .adapters.real_senders import (
+    send_email_batch_via_mailgun_from_env,
     send_email_via_mailgun_from_env,
     send_sms_via_twilio_from_env,
 )
@@ -20,6 +21,7 @@ from .domain.sms import send_sms_notification
 
 __all__ = [
     "handle_batch",
+    "handle_fetch_batch",
     "handle_message",
     "parse_event_payload",
     "publish_appointment_created_event",
@@ -27,6 +29,7 @@ __all__ = [
     "send_sms_notification",
     "process_notification_event",
     "run_email_worker_forever",
+    "send_email_batch_via_mailgun_from_env",
     "send_email_via_console",
     "send_email_via_mailgun_from_env",
     "send_sms_via_console",
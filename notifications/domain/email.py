@@ -13,14 +13,23 @@ from __future__ import annotations
 
 from ..types import ChannelResult, Event, SendEmailFn
 
+_SUBJECT_TEMPLATE = "Appointment confirmed: {appointment_time}".format_map
+_BODY_TEMPLATE = "Appointment {appointment_id} is confirmed for {appointment_time}.".format_map
+
+
+def _not_requested() -> ChannelResult:
+    """Result for events that do not request email; a new dict on every call."""
+    return {"channel": "email", "requested": False, "success": True, "error": None}
+
 
 def send_email_notification(event: Event, send_email: SendEmailFn) -> ChannelResult:
     """Run email-channel rules and return a plain channel result dictionary."""
-    if not event.get("notify_email", False):
-        return {"channel": "email", "requested": False, "success": True, "error": None}
+    get = event.get
+    if not get("notify_email", False):
+        return _not_requested()
 
-    contact_email = event.get("email")
-    notification_email = event.get("notification_email") or contact_email
+    contact_email = get("email")
+    notification_email = get("notification_email") or contact_email
     if not notification_email:
         return {
             "channel": "email",
@@ -29,11 +38,12 @@ def send_email_notification(event: Event, send_email: SendEmailFn) -> ChannelRes
             "error": "notify.email=true but appointment.email is missing",
         }
 
-    subject = f"Appointment confirmed: {event.get('appointment_time', '')}"
-    body = (
-        f"Appointment {event.get('appointment_id', '')} is confirmed for "
-        f"{event.get('appointment_time', '')}."
-    )
+    fields = {
+        "appointment_id": get("appointment_id", ""),
+        "appointment_time": get("appointment_time", ""),
+    }
+    subject = _SUBJECT_TEMPLATE(fields)
+    body = _BODY_TEMPLATE(fields)
     if contact_email and notification_email != contact_email:
         body = f"{body}\n\nRequester email: {contact_email}"
 
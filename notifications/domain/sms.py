@@ -13,13 +13,21 @@ from __future__ import annotations
 
 from ..types import ChannelResult, Event, SendSMSFn
 
+_MESSAGE_TEMPLATE = "Appointment {appointment_id} confirmed for {appointment_time}.".format_map
+
+
+def _not_requested() -> ChannelResult:
+    """Result for events that do not request SMS; a new dict on every call."""
+    return {"channel": "sms", "requested": False, "success": True, "error": None}
+
 
 def send_sms_notification(event: Event, send_sms: SendSMSFn) -> ChannelResult:
     """Run SMS-channel rules and return a plain channel result dictionary."""
-    if not event.get("notify_sms", False):
-        return {"channel": "sms", "requested": False, "success": True, "error": None}
+    get = event.get
+    if not get("notify_sms", False):
+        return _not_requested()
 
-    phone = event.get("phone_e164")
+    phone = get("phone_e164")
     if not phone:
         return {
             "channel": "sms",
@@ -28,9 +36,11 @@ def send_sms_notification(event: Event, send_sms: SendSMSFn) -> ChannelResult:
             "error": "notify.sms=true but appointment.phone_e164 is missing",
         }
 
-    message = (
-        f"Appointment {event.get('appointment_id', '')} confirmed for "
-        f"{event.get('appointment_time', '')}."
+    message = _MESSAGE_TEMPLATE(
+        {
+            "appointment_id": get("appointment_id", ""),
+            "appointment_time": get("appointment_time", ""),
+        }
     )
 
     try:
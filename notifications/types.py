@@ -11,4 +11,5 @@ ProcessingResult = dict[str, Any]
 
 SendEmailFn = Callable[..., None]
 SendSMSFn = Callable[..., None]
+SendEmailBatchFn = Callable[[list[dict[str, str]]], None]
 
@@ -4,7 +4,6 @@
 from __future__ import annotations
 
 import argparse
-import os
 import sys
 import uuid
 from datetime import UTC, datetime
@@ -15,11 +14,12 @@ REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
+from notifications.adapters.env_file import load_env_file  # noqa: E402
 from notifications.adapters.kafka_runtime import publish_appointment_created_event  # noqa: E402
 
 
 def main() -> int:
-    _load_env_file(REPO_ROOT / ".env")
+    load_env_file(REPO_ROOT / ".env")
     args = parse_args()
     payload = build_payload(args)
     metadata = publish_appointment_created_event(payload, topic=args.topic)
@@ -109,24 +109,6 @@ def build_payload(args: argparse.Namespace) -> dict[str, object]:
     }
 
 
-def _load_env_file(path: Path) -> None:
-    if not path.exists():
-        return
-
-    for line in path.read_text(encoding="utf-8").splitlines():
-        text = line.strip()
-        if not text or text.startswith("#") or "=" not in text:
-            continue
-        key, value = text.split("=", 1)
-        key = key.strip()
-        value = value.strip()
-        if not key:
-            continue
-        if value.startswith(("'", '"')) and value.endswith(("'", '"')) and len(value) >= 2:
-            value = value[1:-1]
-        os.environ.setdefault(key, value)
-
-
 if __name__ == "__main__":
     sys.exit(main())
 
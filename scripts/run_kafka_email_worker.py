@@ -9,7 +9,6 @@ verification is pending.
 from __future__ import annotations
 
 import argparse
-import os
 import sys
 from pathlib import Path
 
@@ -18,12 +17,13 @@ REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
+from notifications.adapters.env_file import load_env_file  # noqa: E402
 from notifications.adapters.kafka_runtime import run_email_worker_forever  # noqa: E402
 
 
 def main() -> int:
     parse_args()
-    _load_env_file(REPO_ROOT / ".env")
+    load_env_file(REPO_ROOT / ".env")
     return run_email_worker_forever()
 
 
@@ -34,23 +34,5 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def _load_env_file(path: Path) -> None:
-    if not path.exists():
-        return
-
-    for line in path.read_text(encoding="utf-8").splitlines():
-        text = line.strip()
-        if not text or text.startswith("#") or "=" not in text:
-            continue
-        key, value = text.split("=", 1)
-        key = key.strip()
-        value = value.strip()
-        if not key:
-            continue
-        if value.startswith(("'", '"')) and value.endswith(("'", '"')) and len(value) >= 2:
-            value = value[1:-1]
-        os.environ.setdefault(key, value)
-
-
 if __name__ == "__main__":
     sys.exit(main())
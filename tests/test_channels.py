@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import json
+import pickle
+import threading
 import unittest
 
 from notifications.channels import (
@@ -38,6 +41,23 @@ class ChannelFunctionTests(unittest.TestCase):
         self.assertTrue(result["success"])
         self.assertEqual(len(sent), 1)
 
+    def test_send_email_notification_renders_templates(self) -> None:
+        event = make_event(notify_sms=False, notification_email="owner@example.com")
+        sent: list[dict[str, str]] = []
+
+        def fake_send_email(*, to_email: str, subject: str, body: str) -> None:
+            sent.append({"to_email": to_email, "subject": subject, "body": body})
+
+        send_email_notification(event, fake_send_email)
+
+        self.assertEqual(sent[0]["to_email"], "owner@example.com")
+        self.assertEqual(sent[0]["subject"], "Appointment confirmed: 2026-02-20T15:00:00Z")
+        self.assertEqual(
+            sent[0]["body"],
+            "Appointment apt-1 is confirmed for 2026-02-20T15:00:00Z.\n\n"
+            "Requester email: person@example.com",
+        )
+
     def test_send_email_notification_missing_email(self) -> None:
         event = make_event(email=None, notify_sms=False)
         sent: list[dict[str, str]] = []
@@ -117,6 +137,66 @@ class ProcessingTests(unittest.TestCase):
         self.assertFalse(sms_result["success"])
         self.assertIn("sms provider unavailable", sms_result["error"] or "")
 
+    def test_process_notification_event_overlaps_email_and_sms_sends(self) -> None:
+        both_sending = threading.Barrier(2, timeout=5)
+
+        def fake_send_email(*, to_email: str, subject: str, body: str) -> None:
+            both_sending.wait()
+
+        def fake_send_sms(*, to_phone_e164: str, message: str) -> None:
+            both_sending.wait()
+
+        result = process_notification_event(make_event(), fake_send_email, fake_send_sms)
+
+        self.assertTrue(result["all_requested_succeeded"])
+        self.assertEqual([item["channel"] for item in result["channel_results"]], ["email", "sms"])
+
+    def test_process_notification_event_opted_out_skips_senders(self) -> None:
+        def fail_send(**kwargs: str) -> None:
+            raise AssertionError("no channel was requested")
+
+        result = process_notification_event(
+            make_event(notify_email=False, notify_sms=False), fail_send, fail_send
+        )
+
+        self.assertTrue(result["all_requested_succeeded"])
+        self.assertEqual(result["event_id"], "evt-1")
+        self.assertIsInstance(result["channel_results"], list)
+        self.assertEqual(
+            [(item["channel"], item["requested"]) for item in result["channel_results"]],
+            [("email", False), ("sms", False)],
+        )
+
+    def test_process_notification_event_single_channel_paths(self) -> None:
+        def fail_send_email(*, to_email: str, subject: str, body: str) -> None:
+            raise RuntimeError("mailgun down")
+
+        def fail_send_sms(*, to_phone_e164: str, message: str) -> None:
+            raise AssertionError("sms was not requested")
+
+        email_only = process_notification_event(
+            make_event(notify_sms=False), fail_send_email, fail_send_sms
+        )
+        sms_only = process_notification_event(
+            make_event(notify_email=False), fail_send_sms, lambda **kwargs: None
+        )
+
+        self.assertFalse(email_only["all_requested_succeeded"])
+        self.assertEqual(
+            [(item["channel"], item["requested"]) for item in email_only["channel_results"]],
+            [("email", True), ("sms", False)],
+        )
+        self.assertTrue(sms_only["all_requested_succeeded"])
+        self.assertEqual(
+            [(item["channel"], item["requested"]) for item in sms_only["channel_results"]],
+            [("email", False), ("sms", True)],
+        )
+        # Every result is a fresh plain dict, so callers can mutate or serialize it.
+        for item in email_only["channel_results"] + sms_only["channel_results"]:
+            self.assertIs(type(item), dict)
+        json.dumps([email_only, sms_only])
+        pickle.dumps([email_only, sms_only])
+
 
 class EventModelTests(unittest.TestCase):
     def test_parse_event_payload_maps_kafka_style_payload(self) -> None:
@@ -138,6 +218,29 @@ class EventModelTests(unittest.TestCase):
         self.assertTrue(event["notify_email"])
         self.assertFalse(event["notify_sms"])
 
+    def test_parse_event_payload_complete_and_partial_payloads_agree(self) -> None:
+        complete = {
+            "event_id": "evt-3",
+            "notify": {"email": True, "sms": True},
+            "appointment": {
+                "appointment_id": "apt-3",
+                "user_id": "user-3",
+                "time": "2026-02-23T09:00:00Z",
+                "email": "a@example.com",
+                "phone_e164": None,
+            },
+        }
+        partial = complete | {
+            "appointment": {
+                key: value
+                for key, value in complete["appointment"].items()
+                if key != "phone_e164"
+            }
+        }
+
+        self.assertEqual(parse_event_payload(complete), parse_event_payload(partial))
+        self.assertIsNone(parse_event_payload(complete)["phone_e164"])
+
     def test_parse_event_payload_requires_event_id(self) -> None:
         payload = {
             "notify": {"email": True, "sms": False},
@@ -2,8 +2,15 @@ from __future__ import annotations
 
 import unittest
 from typing import Any
+from unittest import mock
 
-from notifications.adapters.consumer_handler import handle_batch, handle_message
+from notifications.adapters import consumer_handler
+from notifications.adapters.consumer_handler import (
+    handle_batch,
+    handle_fetch_batch,
+    handle_message,
+)
+from notifications.adapters.real_senders import EmailBatchSendError, ProviderUnavailableError
 
 
 def make_record(value: dict[str, Any], *, offset: int) -> dict[str, Any]:
@@ -128,6 +135,91 @@ class ConsumerHandlerTests(unittest.TestCase):
         self.assertEqual(rejected, [12])
         self.assertIn("parse_failed", result["error"] or "")
 
+    def test_handle_message_defers_instead_of_rejecting_when_provider_unavailable(
+        self,
+    ) -> None:
+        committed: list[int] = []
+        rejected: list[int] = []
+        deferred: list[tuple[int, float]] = []
+
+        def send_email(*, to_email: str, subject: str, body: str) -> None:
+            raise ProviderUnavailableError("Mailgun email send failed: provider circuit open", 12.0)
+
+        result = handle_message(
+            make_record(make_payload(notify={"email": True, "sms": False}), offset=70),
+            send_email=send_email,
+            send_sms=lambda **_kwargs: None,
+            commit=lambda record: committed.append(int(record["offset"])),
+            reject=lambda record, reason: rejected.append(int(record["offset"])),
+            defer=lambda record, exc: deferred.append((int(record["offset"]), exc.retry_after)),
+        )
+
+        self.assertEqual(result["status"], "provider_unavailable")
+        self.assertFalse(result["should_commit"])
+        self.assertIn("circuit open", result["error"])
+        self.assertEqual((committed, rejected), ([], []))
+        self.assertEqual(deferred, [(70, 12.0)])
+
+    def test_handle_batch_does_not_dead_letter_records_deferred_for_provider(self) -> None:
+        sink = mock.Mock()
+
+        def send_email(*, to_email: str, subject: str, body: str) -> None:
+            raise ProviderUnavailableError("circuit open", 1.0)
+
+        results = handle_batch(
+            [make_record(make_payload(notify={"email": True, "sms": False}), offset=71)],
+            send_email=send_email,
+            send_sms=lambda **_kwargs: None,
+            commit=lambda record: None,
+            dlq_sink=sink,
+            defer=lambda record, exc: None,
+        )
+
+        self.assertEqual(results[0]["status"], "provider_unavailable")
+        sink.send.assert_not_called()
+        sink.flush.assert_not_called()
+
+    def test_handle_message_rejects_instead_of_deferring_after_partial_delivery(
+        self,
+    ) -> None:
+        rejected: list[str] = []
+        deferred: list[int] = []
+
+        def send_sms(*, to_phone_e164: str, message: str) -> None:
+            raise ProviderUnavailableError("Twilio SMS send failed: provider circuit open", 5.0)
+
+        result = handle_message(
+            make_record(make_payload(), offset=72),
+            send_email=lambda **_kwargs: None,
+            send_sms=send_sms,
+            commit=lambda record: None,
+            reject=lambda record, reason: rejected.append(reason),
+            defer=lambda record, exc: deferred.append(int(record["offset"])),
+        )
+
+        # The email already went out, so redelivering would send it again.
+        self.assertEqual(result["status"], "processed_not_committed")
+        self.assertEqual(deferred, [])
+        self.assertEqual(len(rejected), 1)
+        self.assertIn("circuit open", rejected[0])
+
+    def test_handle_message_rejects_when_provider_unavailable_without_defer(self) -> None:
+        rejected: list[int] = []
+
+        def send_email(*, to_email: str, subject: str, body: str) -> None:
+            raise ProviderUnavailableError("circuit open", 1.0)
+
+        result = handle_message(
+            make_record(make_payload(notify={"email": True, "sms": False}), offset=73),
+            send_email=send_email,
+            send_sms=lambda **_kwargs: None,
+            commit=lambda record: None,
+            reject=lambda record, reason: rejected.append(int(record["offset"])),
+        )
+
+        self.assertEqual(result["status"], "processed_not_committed")
+        self.assertEqual(rejected, [73])
+
     def test_handle_batch_mixes_commit_and_no_commit(self) -> None:
         records = [
             make_record(make_payload(), offset=20),
@@ -171,6 +263,238 @@ class ConsumerHandlerTests(unittest.TestCase):
         self.assertEqual(committed, [20])
         self.assertEqual(rejected, [21])
 
+    def test_handle_batch_with_workers_keeps_result_order(self) -> None:
+        records = [make_record(make_payload(), offset=offset) for offset in range(30, 36)]
+        committed: list[int] = []
+
+        def send_email(*, to_email: str, subject: str, body: str) -> None:
+            return None
+
+        def send_sms(*, to_phone_e164: str, message: str) -> None:
+            return None
+
+        def commit(message_record: dict[str, Any]) -> None:
+            committed.append(int(message_record["offset"]))
+
+        results = handle_batch(
+            records,
+            send_email=send_email,
+            send_sms=send_sms,
+            commit=commit,
+            max_workers=4,
+        )
+
+        self.assertEqual([r["record_meta"]["offset"] for r in results], list(range(30, 36)))
+        self.assertEqual(sorted(committed), list(range(30, 36)))
+
+    def test_handle_batch_sends_all_emails_in_one_batch_call(self) -> None:
+        records = [
+            make_record(make_payload(), offset=40),
+            make_record({"event_id": "evt-bad"}, offset=41),
+            make_record(make_payload(event_id="evt-3"), offset=42),
+        ]
+        batches: list[list[dict[str, str]]] = []
+        committed: list[int] = []
+        rejected: list[int] = []
+
+        def send_email(*, to_email: str, subject: str, body: str) -> None:
+            raise AssertionError("per-record send_email should not run")
+
+        def send_sms(*, to_phone_e164: str, message: str) -> None:
+            return None
+
+        results = handle_batch(
+            records,
+            send_email=send_email,
+            send_sms=send_sms,
+            commit=lambda record: committed.append(int(record["offset"])),
+            reject=lambda record, reason: rejected.append(int(record["offset"])),
+            send_email_batch=batches.append,
+        )
+
+        self.assertEqual(len(batches), 1)
+        self.assertEqual([m["to_email"] for m in batches[0]], ["person@example.com"] * 2)
+        self.assertEqual(
+            [r["status"] for r in results],
+            ["processed_and_committed", "parse_failed", "processed_and_committed"],
+        )
+        self.assertEqual(committed, [40, 42])
+        self.assertEqual(rejected, [41])
+
+    def test_handle_batch_falls_back_to_per_record_email_when_batch_fails(self) -> None:
+        records = [
+            make_record(make_payload(), offset=50),
+            make_record(
+                make_payload(
+                    appointment={
+                        "appointment_id": "apt-2",
+                        "user_id": "user-2",
+                        "time": "2026-02-20T16:00:00Z",
+                        "email": "broken@example.com",
+                        "phone_e164": "+15555550123",
+                    }
+                ),
+                offset=51,
+            ),
+        ]
+        committed: list[int] = []
+        rejected: list[int] = []
+
+        def send_email_batch(messages: list[dict[str, str]]) -> None:
+            raise RuntimeError("batch rejected")
+
+        def send_email(*, to_email: str, subject: str, body: str) -> None:
+            if to_email == "broken@example.com":
+                raise RuntimeError("mailbox unavailable")
+
+        def send_sms(*, to_phone_e164: str, message: str) -> None:
+            return None
+
+        results = handle_batch(
+            records,
+            send_email=send_email,
+            send_sms=send_sms,
+            commit=lambda record: committed.append(int(record["offset"])),
+            reject=lambda record, reason: rejected.append(int(record["offset"])),
+            send_email_batch=send_email_batch,
+        )
+
+        self.assertEqual(committed, [50])
+        self.assertEqual(rejected, [51])
+        email_result = results[1]["processing"]["channel_results"][0]
+        self.assertFalse(email_result["success"])
+        self.assertEqual(email_result["error"], "mailbox unavailable")
+
+    def test_handle_batch_resends_only_undelivered_emails_after_partial_batch_failure(
+        self,
+    ) -> None:
+        records = [make_record(make_payload(), offset=60), make_record(make_payload(), offset=61)]
+        committed: list[int] = []
+        resent: list[str] = []
+
+        def send_email_batch(messages: list[dict[str, str]]) -> None:
+            # The first message went out; the call carrying the second failed.
+            raise EmailBatchSendError("second call failed", messages[1:])
+
+        def send_email(*, to_email: str, subject: str, body: str) -> None:
+            resent.append(body)
+
+        handle_batch(
+            records,
+            send_email=send_email,
+            send_sms=lambda **_kwargs: None,
+            commit=lambda record: committed.append(int(record["offset"])),
+            send_email_batch=send_email_batch,
+        )
+
+        self.assertEqual(len(resent), 1)
+        self.assertEqual(committed, [60, 61])
+
+    def test_handle_batch_publishes_rejections_to_dlq_sink_with_one_flush(self) -> None:
+        records = [
+            make_record(make_payload(), offset=80),
+            make_record({"notify": {"email": True}}, offset=81),
+            make_record(make_payload(event_id="evt-bad", appointment=None), offset=82),
+        ]
+        sink = mock.Mock()
+        rejected: list[int] = []
+
+        def send_email(*, to_email: str, subject: str, body: str) -> None:
+            return None
+
+        def send_sms(*, to_phone_e164: str, message: str) -> None:
+            return None
+
+        handle_batch(
+            records,
+            send_email=send_email,
+            send_sms=send_sms,
+            commit=lambda record: None,
+            reject=lambda record, reason: rejected.append(int(record["offset"])),
+            dlq_sink=sink,
+        )
+
+        self.assertEqual(rejected, [81, 82])
+        self.assertEqual(sink.send.call_count, 2)
+        topic = sink.send.call_args_list[0].args[0]
+        envelope = sink.send.call_args_list[1].kwargs["value"]
+        self.assertEqual(topic, "appointments.created.dlq")
+        self.assertEqual(envelope["source"]["offset"], 82)
+        self.assertEqual(envelope["source_event_id"], "evt-bad")
+        self.assertTrue(envelope["failure_reason"].startswith("parse_failed"))
+        sink.flush.assert_called_once_with()
+
+    def test_handle_batch_keeps_sending_and_flushes_when_a_dlq_send_fails(self) -> None:
+        records = [
+            make_record({"notify": {"email": True}}, offset=83),
+            make_record({"notify": {"email": True}}, offset=84),
+        ]
+        sink = mock.Mock()
+        sink.send.side_effect = [RuntimeError("broker down"), None]
+
+        results = handle_batch(
+            records,
+            send_email=lambda **_kwargs: None,
+            send_sms=lambda **_kwargs: None,
+            commit=lambda record: None,
+            dlq_sink=sink,
+        )
+
+        self.assertEqual(sink.send.call_count, 2)
+        sink.flush.assert_called_once_with()
+        self.assertEqual(results[0]["dlq_error"], "dlq_send_failed: broker down")
+        self.assertNotIn("dlq_error", results[1])
+
+    def test_handle_fetch_batch_commits_once_up_to_first_failure_per_partition(self) -> None:
+        def make(partition: int, offset: int, *, phone: str | None = "+15555550123") -> Any:
+            payload = make_payload()
+            payload["appointment"] = payload["appointment"] | {"phone_e164": phone}
+            return make_record(payload, offset=offset) | {"partition": partition}
+
+        records = [
+            make(0, 60),
+            make(1, 70),
+            make(0, 61, phone=None),
+            make(1, 71),
+            make(0, 62),
+        ]
+        commits: list[dict[tuple[Any, Any], int]] = []
+        rejected: list[int] = []
+
+        def send_email(*, to_email: str, subject: str, body: str) -> None:
+            return None
+
+        def send_sms(*, to_phone_e164: str, message: str) -> None:
+            return None
+
+        results = handle_fetch_batch(
+            records,
+            send_email=send_email,
+            send_sms=send_sms,
+            commit_offsets=commits.append,
+            reject=lambda record, reason: rejected.append(int(record["offset"])),
+        )
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual(
+            commits,
+            [{("appointments.created", 0): 61, ("appointments.created", 1): 72}],
+        )
+        self.assertEqual(rejected, [61])
+
+    def test_failed_at_timestamp_is_reused_within_one_millisecond(self) -> None:
+        with mock.patch.object(consumer_handler.time, "time_ns") as time_ns:
+            time_ns.return_value = 1_771_600_000_123_400_000
+            first = consumer_handler._failed_at_timestamp()
+            time_ns.return_value += 500_000
+            second = consumer_handler._failed_at_timestamp()
+            time_ns.return_value += 1_000_000
+            third = consumer_handler._failed_at_timestamp()
+
+        self.assertEqual(first, "2026-02-20T15:06:40.123+00:00")
+        self.assertIs(second, first)
+        self.assertEqual(third, "2026-02-20T15:06:40.124+00:00")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from notifications.adapters.env_file import load_env_file, parse_env_text
+
+
+class EnvFileTests(unittest.TestCase):
+    def test_parse_env_text_skips_comments_and_strips_matching_quotes(self) -> None:
+        text = (
+            "# Mailgun\n"
+            "MAILGUN_DOMAIN = sandbox.example.com \n"
+            "\n"
+            "MAILGUN_FROM_EMAIL=\"Your App <no-reply@example.com>\"\r\n"
+            "SINGLE='quoted'\n"
+            "MISMATCHED='value\"\n"
+            "not an assignment\n"
+            "EMPTY=\n"
+        )
+
+        self.assertEqual(
+            list(parse_env_text(text)),
+            [
+                ("MAILGUN_DOMAIN", "sandbox.example.com"),
+                ("MAILGUN_FROM_EMAIL", "Your App <no-reply@example.com>"),
+                ("SINGLE", "quoted"),
+                ("MISMATCHED", "'value\""),
+                ("EMPTY", ""),
+            ],
+        )
+
+    @mock.patch.dict(os.environ, {"KAFKA_GROUP_ID": "from-env"}, clear=True)
+    def test_load_env_file_does_not_override_existing_variables(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / ".env"
+            path.write_text("KAFKA_GROUP_ID=from-file\nKAFKA_TOPIC=topic\n", encoding="utf-8")
+
+            load_env_file(path)
+            load_env_file(Path(directory) / "missing.env")
+
+            self.assertEqual(os.environ["KAFKA_GROUP_ID"], "from-env")
+            self.assertEqual(os.environ["KAFKA_TOPIC"], "topic")
+
+
+if __name__ == "__main__":
+    unittest.main()
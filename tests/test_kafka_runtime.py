@@ -1,9 +1,20 @@
 from __future__ import annotations
 
+import collections
+import io
+import json
+import logging
+import threading
 import unittest
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Any
 from unittest import mock
 
 from notifications.adapters import kafka_runtime
+from notifications.adapters.real_senders import ProviderUnavailableError
+
+RevokedPartition = collections.namedtuple("RevokedPartition", ["topic", "partition"])
 
 
 class KafkaRuntimeHelperTests(unittest.TestCase):
@@ -18,7 +29,25 @@ class KafkaRuntimeHelperTests(unittest.TestCase):
         with self.assertRaises(ValueError):
             kafka_runtime._deserialize_json_object(b'["not","an","object"]')
 
-    def test_with_sms_disabled_forces_notify_sms_false(self) -> None:
+    def test_deserialize_json_object_matches_stdlib_for_big_ints_and_nan(self) -> None:
+        raw = b'{"big":123456789012345678901234567890,"neg":-9223372036854775809,"x":NaN}'
+        payload = kafka_runtime._deserialize_json_object(raw)
+        self.assertEqual(payload["big"], 123456789012345678901234567890)
+        self.assertEqual(payload["neg"], -9223372036854775809)
+        self.assertNotEqual(payload["x"], payload["x"])
+        self.assertEqual(
+            kafka_runtime._deserialize_json_object('{"y":Infinity}')["y"], float("inf")
+        )
+
+    def test_json_codec_round_trips_without_orjson(self) -> None:
+        payload = {"event_id": "evt-1", "notify": {"email": True, "sms": False}}
+        with mock.patch.object(kafka_runtime, "orjson", None):
+            raw = kafka_runtime._serialize_json_object(payload)
+            decoded = kafka_runtime._deserialize_json_object(raw)
+        self.assertIsInstance(raw, bytes)
+        self.assertEqual(decoded, payload)
+
+    def test_with_sms_disabled_forces_notify_sms_false_in_place(self) -> None:
         payload = {
             "event_id": "evt-1",
             "notify": {"email": True, "sms": True},
@@ -26,8 +55,17 @@ class KafkaRuntimeHelperTests(unittest.TestCase):
         }
         transformed = kafka_runtime._with_sms_disabled(payload)
 
-        self.assertEqual(transformed["notify"]["sms"], False)
-        self.assertEqual(payload["notify"]["sms"], True)
+        self.assertIs(transformed, payload)
+        self.assertEqual(transformed["notify"], {"email": True, "sms": False})
+
+    def test_with_sms_disabled_copies_non_dict_notify_mapping(self) -> None:
+        payload = {"event_id": "evt-1", "notify": MappingProxyType({"email": True, "sms": True})}
+        transformed = kafka_runtime._with_sms_disabled(payload)
+        self.assertEqual(transformed["notify"], {"email": True, "sms": False})
+
+    def test_with_sms_disabled_adds_missing_notify(self) -> None:
+        transformed = kafka_runtime._with_sms_disabled({"event_id": "evt-1", "notify": None})
+        self.assertEqual(transformed["notify"], {"sms": False})
 
     def test_bootstrap_servers_from_env_parses_csv(self) -> None:
         env = {"KAFKA_BOOTSTRAP_SERVERS": "localhost:9092, kafka:29092 "}
@@ -35,11 +73,88 @@ class KafkaRuntimeHelperTests(unittest.TestCase):
             servers = kafka_runtime._bootstrap_servers_from_env()
         self.assertEqual(servers, ["localhost:9092", "kafka:29092"])
 
+    def test_bootstrap_servers_from_env_rejects_blank_list(self) -> None:
+        with mock.patch.dict("os.environ", {"KAFKA_BOOTSTRAP_SERVERS": " , ,"}, clear=True):
+            with self.assertRaises(RuntimeError):
+                kafka_runtime._bootstrap_servers_from_env()
+
     def test_bootstrap_servers_from_env_requires_value(self) -> None:
         with mock.patch.dict("os.environ", {}, clear=True):
             with self.assertRaises(RuntimeError):
                 kafka_runtime._bootstrap_servers_from_env()
 
+    def test_worker_config_from_env_defaults(self) -> None:
+        env = {"KAFKA_BOOTSTRAP_SERVERS": "localhost:9092"}
+        with mock.patch.dict("os.environ", env, clear=True):
+            config = kafka_runtime._WorkerConfig.from_env()
+
+        self.assertEqual(config.bootstrap_servers, ["localhost:9092"])
+        self.assertEqual(config.topic_name, "appointments.created")
+        self.assertEqual(config.dlq_topic, "appointments.created.dlq")
+        self.assertEqual(config.max_records, 500)
+        self.assertEqual(config.poll_timeout_ms, 1000)
+        self.assertTrue(config.force_sms_disabled)
+        self.assertTrue(config.commit_async)
+
+    def test_producer_options_from_env_defaults(self) -> None:
+        with mock.patch.dict("os.environ", {}, clear=True):
+            options = kafka_runtime._producer_options_from_env()
+        self.assertEqual(options["acks"], "all")
+        self.assertEqual(options["compression_type"], "gzip")
+        self.assertEqual(options["linger_ms"], 20)
+        self.assertEqual(options["batch_size"], 131072)
+
+    def test_producer_options_from_env_allows_disabling_compression(self) -> None:
+        with mock.patch.dict("os.environ", {"KAFKA_PRODUCER_COMPRESSION": "none"}, clear=True):
+            options = kafka_runtime._producer_options_from_env()
+        self.assertIsNone(options["compression_type"])
+
+    def test_mark_offset_processed_keeps_highest_offset_per_partition(self) -> None:
+        pending: dict[object, int] = {}
+
+        kafka_runtime._mark_offset_processed(pending, ("appointments.created", 0), 7)
+        kafka_runtime._mark_offset_processed(pending, ("appointments.created", 0), 5)
+        kafka_runtime._mark_offset_processed(pending, ("appointments.created", 1), 3)
+
+        self.assertEqual(
+            pending,
+            {("appointments.created", 0): 7, ("appointments.created", 1): 3},
+        )
+
+    def test_commit_interval_seconds_from_env_defaults_to_five_seconds(self) -> None:
+        with mock.patch.dict("os.environ", {}, clear=True):
+            self.assertEqual(kafka_runtime._commit_interval_seconds_from_env(), 5.0)
+
+    def test_log_commit_result_reports_only_failures(self) -> None:
+        topic_partition = mock.Mock(topic="appointments.created", partition=0)
+        with mock.patch.object(kafka_runtime, "logger") as logger_mock:
+            kafka_runtime._log_commit_result({topic_partition: object()}, object())
+            logger_mock.error.assert_not_called()
+            kafka_runtime._log_commit_result({topic_partition: object()}, RuntimeError("boom"))
+        self.assertEqual(logger_mock.error.call_args.args[1], "appointments.created:0")
+
+    def test_start_log_listener_writes_worker_logs_to_stderr(self) -> None:
+        stderr = io.StringIO()
+        with mock.patch.object(kafka_runtime.sys, "stderr", stderr):
+            stop = kafka_runtime._start_log_listener()
+            kafka_runtime.logger.info("[RESULT] offset=%s", 3)
+            stop()
+
+        self.assertEqual(stderr.getvalue(), "[RESULT] offset=3\n")
+        self.assertTrue(kafka_runtime.logger.propagate)
+
+    def test_start_log_listener_restores_previous_logger_settings(self) -> None:
+        logger = kafka_runtime.logger
+        self.addCleanup(setattr, logger, "propagate", logger.propagate)
+        self.addCleanup(logger.setLevel, logger.level)
+        logger.setLevel(logging.WARNING)
+        logger.propagate = False
+
+        kafka_runtime._start_log_listener()()
+
+        self.assertEqual(logger.level, logging.WARNING)
+        self.assertFalse(logger.propagate)
+
     def test_offset_and_metadata_prefers_three_arg_signature(self) -> None:
         calls: list[tuple[int, str, object | None]] = []
 
@@ -62,7 +177,28 @@ class KafkaRuntimeHelperTests(unittest.TestCase):
         self.assertEqual(built, (42, ""))
         self.assertEqual(calls, [(42, "")])
 
-    def test_to_json_compatible_converts_non_json_types(self) -> None:
+    def test_offset_and_metadata_factory_probes_signature_once(self) -> None:
+        calls: list[tuple[int, str, object | None]] = []
+
+        def factory(offset: int, metadata: str, leader_epoch: object | None) -> int:
+            calls.append((offset, metadata, leader_epoch))
+            return offset
+
+        build = kafka_runtime._offset_and_metadata_factory(factory)
+
+        self.assertEqual([build(1), build(2)], [1, 2])
+        self.assertEqual(calls, [(1, "", -1), (2, "", -1)])
+        self.assertIs(kafka_runtime._offset_and_metadata_factory(factory), build)
+
+    def test_serialize_json_object_is_strict_for_published_events(self) -> None:
+        for codec in (kafka_runtime.orjson, None):
+            with mock.patch.object(kafka_runtime, "orjson", codec):
+                with self.assertRaises(TypeError):
+                    kafka_runtime._serialize_json_object({"amount": Decimal("1.5")})
+                raw = kafka_runtime._serialize_json_object({1: 2})
+            self.assertEqual(json.loads(raw), {"1": 2})
+
+    def test_serialize_dlq_json_object_converts_non_json_types(self) -> None:
         value = {
             "raw_bytes": b"abc",
             "nested": {"items": [1, b"\xff", {"ok": True}]},
@@ -70,14 +206,22 @@ class KafkaRuntimeHelperTests(unittest.TestCase):
             "object": object(),
         }
 
-        converted = kafka_runtime._to_json_compatible(value)
+        converted = json.loads(kafka_runtime._serialize_dlq_json_object(value))
 
         self.assertEqual(converted["raw_bytes"], "abc")
         self.assertEqual(converted["nested"]["items"][0], 1)
         self.assertEqual(converted["nested"]["items"][1], "\ufffd")
-        self.assertIsInstance(converted["set_value"], list)
+        self.assertEqual(sorted(converted["set_value"]), ["a", "b"])
         self.assertIsInstance(converted["object"], str)
 
+    def test_json_default_handles_exact_types_and_subclasses(self) -> None:
+        class Tags(frozenset):
+            pass
+
+        self.assertEqual(kafka_runtime._json_default(bytearray(b"\xff")), "\ufffd")
+        self.assertEqual(kafka_runtime._json_default(frozenset({"a"})), ["a"])
+        self.assertEqual(kafka_runtime._json_default(Tags({"b"})), ["b"])
+
     def test_build_dlq_payload_includes_source_metadata_and_event_id(self) -> None:
         source_payload = {
             "event_id": "evt-abc",
@@ -101,5 +245,257 @@ class KafkaRuntimeHelperTests(unittest.TestCase):
         self.assertIn("failed_at", dlq_payload)
 
 
+class PublishProducerReuseTests(unittest.TestCase):
+    def setUp(self) -> None:
+        kafka_runtime._close_producer()
+        self.addCleanup(kafka_runtime._close_producer)
+
+    def test_publish_reuses_one_producer_across_calls(self) -> None:
+        producer_type = mock.Mock()
+        producer = producer_type.return_value
+        producer.send.return_value.get.return_value = mock.Mock(
+            topic="appointments.created", partition=0, offset=7
+        )
+        env = {"KAFKA_BOOTSTRAP_SERVERS": "localhost:9092"}
+
+        with (
+            mock.patch.dict("os.environ", env, clear=True),
+            mock.patch.object(
+                kafka_runtime,
+                "_import_kafka_python",
+                return_value=(mock.Mock(), producer_type, mock.Mock(), mock.Mock(), object),
+            ),
+            mock.patch.object(kafka_runtime.atexit, "register"),
+        ):
+            first = kafka_runtime.publish_appointment_created_event({"event_id": "evt-1"})
+            kafka_runtime.publish_appointment_created_event({"event_id": "evt-2"})
+
+        self.assertEqual(first, {"topic": "appointments.created", "partition": 0, "offset": 7})
+        self.assertEqual(producer_type.call_count, 1)
+        self.assertEqual(producer.send.call_count, 2)
+        producer.close.assert_not_called()
+
+
+def _worker_message(offset: int, email: str, *, sms: bool = False) -> mock.Mock:
+    value = json.dumps(
+        {
+            "event_id": f"evt-{offset}",
+            "notify": {"email": True, "sms": sms},
+            "appointment": {"appointment_id": "apt-1", "email": email},
+        }
+    ).encode("utf-8")
+    return mock.Mock(topic="appointments.created", partition=0, offset=offset, value=value)
+
+
+def _topic_partition(topic: str, partition: int) -> tuple[str, int]:
+    return (topic, partition)
+
+
+def _run_worker(
+    consumer: mock.Mock,
+    producer: mock.Mock | None,
+    send_email: Any,
+    env: dict[str, str],
+) -> int:
+    """Run `run_email_worker_forever` against mock kafka-python objects."""
+    kafka_python = (
+        mock.Mock(return_value=consumer),
+        mock.Mock(return_value=producer or mock.Mock()),
+        _topic_partition,
+        mock.Mock(),
+        object,
+    )
+    with (
+        mock.patch.dict(
+            "os.environ", {"KAFKA_BOOTSTRAP_SERVERS": "localhost:9092"} | env, clear=True
+        ),
+        mock.patch.object(kafka_runtime, "_import_kafka_python", return_value=kafka_python),
+        mock.patch.object(
+            kafka_runtime, "_offset_and_metadata_factory", lambda _type: lambda o: o
+        ),
+        mock.patch.object(kafka_runtime, "send_email_via_mailgun_from_env", send_email),
+        mock.patch.object(kafka_runtime, "_start_log_listener", return_value=lambda: None),
+        mock.patch.object(kafka_runtime, "logger"),
+    ):
+        return kafka_runtime.run_email_worker_forever()
+
+
+PARTITION = ("appointments.created", 0)
+
+
+class EmailWorkerLoopTests(unittest.TestCase):
+    def test_worker_commits_processed_and_dlq_offsets_on_shutdown(self) -> None:
+        bad = mock.Mock(topic="appointments.created", partition=0, offset=6, value=b"{not json")
+        consumer = mock.Mock()
+        consumer.poll.side_effect = [
+            {PARTITION: [_worker_message(5, "a@example.com", sms=True), bad]},
+            {},
+            KeyboardInterrupt,
+        ]
+        producer = mock.Mock()
+        dlq_metadata = mock.Mock(topic="appointments.created.dlq", partition=0, offset=0)
+        acks: list[Any] = []
+        producer.send.return_value.add_callback.side_effect = (
+            lambda fn, *args: acks.append(lambda: fn(*args, dlq_metadata))
+        )
+        # DLQ acks arrive on the producer I/O thread; deliver them on flush.
+        producer.flush.side_effect = lambda timeout=None: [ack() for ack in acks]
+        sent: list[str] = []
+
+        def fake_send_email(*, to_email: str, subject: str, body: str) -> None:
+            sent.append(to_email)
+
+        exit_code = _run_worker(
+            consumer, producer, fake_send_email, {"KAFKA_COMMIT_ASYNC": "false"}
+        )
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(sent, ["a@example.com"])
+        self.assertEqual(producer.send.call_count, 1)
+        dlq_payload = producer.send.call_args.kwargs["value"]
+        self.assertIn("decode_failed", dlq_payload["failure_reason"])
+        consumer.commit.assert_called_once_with(offsets={PARTITION: 7})
+        consumer.close.assert_called_once()
+
+    def test_worker_shutdown_cancels_queued_sends(self) -> None:
+        first_send_started = threading.Event()
+        release_first_send = threading.Event()
+        sent: list[str] = []
+
+        def fake_send_email(*, to_email: str, subject: str, body: str) -> None:
+            first_send_started.set()
+            release_first_send.wait(timeout=5)
+            sent.append(to_email)
+
+        def interrupt(**_kwargs: Any) -> dict[Any, Any]:
+            first_send_started.wait(timeout=5)
+            # Let the running send finish only after shutdown has cancelled the queue.
+            threading.Timer(0.2, release_first_send.set).start()
+            raise KeyboardInterrupt
+
+        first_poll = {
+            PARTITION: [_worker_message(5, "a@example.com"), _worker_message(6, "b@example.com")]
+        }
+        polls = iter([first_poll])
+        consumer = mock.Mock()
+        consumer.poll.side_effect = lambda **kwargs: next(polls, None) or interrupt(**kwargs)
+
+        exit_code = _run_worker(
+            consumer,
+            None,
+            fake_send_email,
+            {
+                "KAFKA_DLQ_ENABLED": "false",
+                "KAFKA_COMMIT_ASYNC": "false",
+                "NOTIFICATIONS_SEND_CONCURRENCY": "1",
+            },
+        )
+
+        self.assertEqual(exit_code, 0)
+        # The queued second record never ran, so only the first is committed.
+        self.assertEqual(sent, ["a@example.com"])
+        consumer.commit.assert_called_once_with(offsets={PARTITION: 6})
+
+    def test_worker_commits_synchronously_when_partitions_are_revoked(self) -> None:
+        consumer = mock.Mock()
+        commits_during_revoke: list[Any] = []
+
+        def revoke_partitions() -> dict[Any, Any]:
+            listener = consumer.subscribe.call_args.kwargs["listener"]
+            listener.on_partitions_revoked({RevokedPartition(*PARTITION)})
+            commits_during_revoke.extend(consumer.commit.call_args_list)
+            return {}
+
+        polls = iter(
+            [lambda: {PARTITION: [_worker_message(5, "a@example.com")]}, revoke_partitions]
+        )
+
+        def poll(**_kwargs: Any) -> dict[Any, Any]:
+            for next_poll in polls:
+                return next_poll()
+            raise KeyboardInterrupt
+
+        consumer.poll.side_effect = poll
+        sent: list[str] = []
+
+        def fake_send_email(*, to_email: str, subject: str, body: str) -> None:
+            sent.append(to_email)
+
+        exit_code = _run_worker(
+            consumer,
+            None,
+            fake_send_email,
+            {"KAFKA_DLQ_ENABLED": "false", "KAFKA_COMMIT_INTERVAL_MS": "600000"},
+        )
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(sent, ["a@example.com"])
+        expected = mock.call(offsets={PARTITION: 6})
+        self.assertEqual(commits_during_revoke, [expected])
+        # The revoked partition is not re-committed on shutdown.
+        self.assertEqual(consumer.commit.call_args_list, [expected])
+        consumer.commit_async.assert_not_called()
+
+    def test_worker_seeks_back_and_pauses_instead_of_dead_lettering_on_open_circuit(
+        self,
+    ) -> None:
+        consumer = mock.Mock()
+        consumer.poll.side_effect = [
+            {PARTITION: [_worker_message(5, "down@example.com")]},
+            {PARTITION: [_worker_message(6, "ok@example.com")]},
+            {},
+            KeyboardInterrupt,
+        ]
+        producer = mock.Mock()
+        sent: list[str] = []
+
+        exit_code = _run_worker(
+            consumer, producer, _send_unless_down(sent), {"KAFKA_COMMIT_ASYNC": "false"}
+        )
+
+        self.assertEqual(exit_code, 0)
+        producer.send.assert_not_called()
+        consumer.seek.assert_called_once_with(PARTITION, 5)
+        consumer.pause.assert_called_once_with(PARTITION)
+        consumer.resume.assert_not_called()
+        # Offset 6 was fetched before the seek, so it is redelivered, not sent now.
+        self.assertEqual(sent, [])
+        consumer.commit.assert_not_called()
+
+    def test_worker_does_not_commit_past_a_deferred_record(self) -> None:
+        consumer = mock.Mock()
+        consumer.poll.side_effect = [
+            {
+                PARTITION: [
+                    _worker_message(5, "down@example.com"),
+                    _worker_message(6, "ok@example.com"),
+                ]
+            },
+            {},
+            KeyboardInterrupt,
+        ]
+        sent: list[str] = []
+
+        exit_code = _run_worker(
+            consumer, mock.Mock(), _send_unless_down(sent), {"KAFKA_COMMIT_ASYNC": "false"}
+        )
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(sent, ["ok@example.com"])
+        consumer.seek.assert_called_once_with(PARTITION, 5)
+        # Offset 6 succeeded, but committing it would skip the deferred offset 5.
+        consumer.commit.assert_called_once_with(offsets={PARTITION: 5})
+
+
+def _send_unless_down(sent: list[str]) -> Any:
+    """Email sender that records recipients; `down@example.com` hits an open circuit."""
+
+    def send_email(*, to_email: str, subject: str, body: str) -> None:
+        if to_email == "down@example.com":
+            raise ProviderUnavailableError("provider circuit open", 30.0)
+        sent.append(to_email)
+
+    return send_email
+
 if __name__ == "__main__":
     unittest.main()